@@ -0,0 +1,291 @@
+import argparse
+import base64
+import binascii
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import telemetry
+from ats_prompts import PROMPT_VERSION, build_prompt, prompt_templates
+from competency_analysis import analyze_competency
+from gemini_client import generate_text, get_model
+from jd_dedup import find_reusable, remember_result
+from lazy_imports import lazy_module
+from model_scheduler import BATCH, INTERACTIVE
+from pdf_extract import extract_text
+from report_generator import create_bar_chart, create_pdf_report, create_radar_chart
+from text_preprocess import prepare_inputs
+
+pd = lazy_module("pandas")
+
+COMPETENCY_ANALYSIS = "Competency Mapping"
+ANALYSES = list(prompt_templates) + [COMPETENCY_ANALYSIS]
+
+# Jobs running at once, and jobs accepted (queued or running) before new ones are refused with 429.
+WORKERS = int(os.getenv("RESUME_TOOLS_SERVICE_WORKERS", 8))
+MAX_PENDING = int(os.getenv("RESUME_TOOLS_SERVICE_MAX_PENDING", 64))
+# Finished jobs are kept this long (and at most MAX_FINISHED_JOBS of them) for polling clients.
+JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 1000
+
+class QueueFullError(Exception):
+    """Raised when the service already holds `max_pending` unfinished jobs."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many analyses are queued; retry later.")
+        self.retry_after = retry_after
+
+class JobManager:
+    """
+    Runs analysis jobs on a bounded worker pool and keeps their state for polling.
+
+    Jobs are queued in submission order. At most `max_pending` unfinished jobs are accepted;
+    beyond that `submit` raises QueueFullError so clients back off instead of piling up work.
+    """
+
+    def __init__(self, workers: int = WORKERS, max_pending: int = MAX_PENDING, model=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._model = model
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self._jobs = OrderedDict()
+        self._queued = OrderedDict()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._recent_seconds = []
+        self.stats = {"submitted": 0, "rejected": 0, "done": 0, "error": 0}
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_model()
+        return self._model
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from recent job durations."""
+        average = sum(self._recent_seconds) / len(self._recent_seconds) if self._recent_seconds else 1.0
+        return max(1, math.ceil(average * len(self._queued) / self.workers))
+
+    def submit(self, spec: dict) -> dict:
+        with self._lock:
+            self._expire()
+            if len(self._queued) + self._running >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise QueueFullError(self._retry_after())
+            job = {"id": uuid.uuid4().hex, "analysis": spec["analysis"], "status": "queued", "created": time.time(),
+                   "started": None, "finished": None, "error": None, "result": None, "_spec": spec}
+            self._jobs[job["id"]] = job
+            self._queued[job["id"]] = job
+            self.stats["submitted"] += 1
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def describe(self, job: dict) -> dict:
+        """The public view of a job, with its position in the queue while it waits."""
+        with self._lock:
+            view = {key: value for key, value in job.items() if not key.startswith("_") and key != "result"}
+            if job["status"] == "queued" and job["id"] in self._queued:
+                view["queue_position"] = list(self._queued).index(job["id"]) + 1
+        return view
+
+    def _expire(self) -> None:
+        """Forgets finished jobs past their TTL, and the oldest ones beyond MAX_FINISHED_JOBS."""
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished"]]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job_id in enumerate(finished):
+            if i < excess or now - self._jobs[job_id]["finished"] > JOB_TTL_SECONDS:
+                del self._jobs[job_id]
+
+    def _run(self, job: dict) -> None:
+        with self._lock:
+            self._queued.pop(job["id"], None)
+            self._running += 1
+            job["status"], job["started"] = "running", time.time()
+        spec = job.pop("_spec")
+        try:
+            with telemetry.trace(job["analysis"]), telemetry.span("analysis_total", source="service"):
+                result = self._analyze(spec)
+            status, error = "done", None
+        except Exception as e:
+            result, status, error = None, "error", f"{type(e).__name__}: {e}"
+        with self._lock:
+            self._running -= 1
+            job.update(status=status, error=error, finished=time.time())
+            if result is not None:
+                job["_dataframe"] = result.pop("_dataframe", None)
+                job["result"] = result
+            self.stats[status] += 1
+            self._recent_seconds = (self._recent_seconds + [job["finished"] - job["started"]])[-50:]
+
+    def _analyze(self, spec: dict) -> dict:
+        resume_text = spec.get("resume_text") or extract_text(spec["resume_pdf"])
+        if not resume_text.strip():
+            raise ValueError("No text could be extracted from the resume.")
+        jd_text = spec.get("jd_text") or _fetch_job_description(spec["jd_url"])
+        jd_text, resume_text, token_stats = prepare_inputs(jd_text, resume_text)
+        priority = BATCH if spec.get("priority") == "batch" else INTERACTIVE
+        use_cache = spec.get("use_cache", True)
+        if spec["analysis"] == COMPETENCY_ANALYSIS:
+            analysis = analyze_competency(self.model, jd_text, resume_text, use_cache=use_cache, priority=priority,
+                                          reuse_similar_jd=use_cache and spec.get("reuse_similar_jd", True))
+            return {
+                "text": analysis["report_text"],
+                "report": analysis["report"],
+                "competency_matrix": analysis["dataframe"].astype(str).to_dict(orient="records"),
+                "repairs": analysis["repairs"],
+                "reused": analysis["reused"],
+                "token_stats": token_stats,
+                "_dataframe": analysis["dataframe"],
+            }
+        analysis_key = f"{PROMPT_VERSION}:{spec['analysis']}"
+        if use_cache and spec.get("reuse_similar_jd", True):
+            reuse = find_reusable(jd_text, resume_text, analysis_key)
+            if reuse:
+                return {"text": reuse.pop("result"), "reused": reuse, "token_stats": token_stats}
+        prompt = build_prompt(spec["analysis"], jd_text, resume_text)
+        text = generate_text(self.model, prompt, PROMPT_VERSION, timeout=120, use_cache=use_cache, priority=priority)
+        if text:
+            remember_result(jd_text, resume_text, analysis_key, text)
+        return {"text": text, "reused": None, "token_stats": token_stats}
+
+    def pdf_report(self, job: dict) -> bytes:
+        df = job.get("_dataframe")
+        if df is None:
+            return create_pdf_report(job["result"]["text"], pd.DataFrame(), None, None)
+        return create_pdf_report(job["result"]["text"], df, create_radar_chart(df), create_bar_chart(df))
+
+    def health(self) -> dict:
+        with self._lock:
+            return {"queued": len(self._queued), "running": self._running, "workers": self.workers,
+                    "max_pending": self.max_pending, "jobs_kept": len(self._jobs), **self.stats}
+
+def _fetch_job_description(url: str) -> str:
+    from linkedin_scraper import fetch_page, is_linkedin_job_url, parse_job_description
+    if not is_linkedin_job_url(url):
+        raise ValueError("jd_url must be a LinkedIn job posting URL.")
+    jd_text = parse_job_description(fetch_page(url))
+    if not jd_text:
+        raise ValueError("Could not extract the job description from the LinkedIn page.")
+    return jd_text
+
+async def _read_spec(request: Request) -> dict:
+    """Accepts a JSON body (resume PDF as base64) or a multipart form (resume PDF as a file)."""
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        spec = {key: value for key, value in form.items() if isinstance(value, str)}
+        upload = form.get("resume_pdf")
+        if upload is not None and not isinstance(upload, str):
+            spec["resume_pdf"] = await upload.read()
+        for flag in ("use_cache", "reuse_similar_jd"):
+            # Form fields are strings, and "false" would otherwise count as true.
+            spec[flag] = spec.get(flag, "true").lower() not in ("0", "false", "no")
+        return spec
+    spec = await request.json()
+    if not isinstance(spec, dict):
+        raise ValueError("The request body must be a JSON object.")
+    if spec.get("resume_pdf"):
+        try:
+            spec["resume_pdf"] = base64.b64decode(spec["resume_pdf"], validate=True)
+        except (binascii.Error, TypeError):
+            raise ValueError("resume_pdf must be base64-encoded PDF bytes.")
+    return spec
+
+def _validate(spec: dict) -> None:
+    if spec.get("analysis") not in ANALYSES:
+        raise ValueError(f"analysis must be one of: {', '.join(ANALYSES)}")
+    if not (spec.get("jd_text") or spec.get("jd_url")):
+        raise ValueError("Provide jd_text or jd_url.")
+    if not (spec.get("resume_text") or spec.get("resume_pdf")):
+        raise ValueError("Provide resume_text or resume_pdf.")
+
+def create_app(manager: JobManager | None = None) -> Starlette:
+    manager = manager or JobManager()
+
+    async def list_analyses(request: Request):
+        return JSONResponse({"analyses": ANALYSES})
+
+    async def submit_job(request: Request):
+        try:
+            spec = await _read_spec(request)
+            _validate(spec)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        try:
+            job = manager.submit(spec)
+        except QueueFullError as e:
+            return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+        return JSONResponse(manager.describe(job), status_code=202, headers={"Location": f"/jobs/{job['id']}"})
+
+    def _job_or_404(request: Request):
+        job = manager.get(request.path_params["job_id"])
+        return job, (None if job else JSONResponse({"error": "Unknown job."}, status_code=404))
+
+    async def job_status(request: Request):
+        job, missing = _job_or_404(request)
+        return missing or JSONResponse(manager.describe(job))
+
+    async def job_result(request: Request):
+        job, missing = _job_or_404(request)
+        if missing:
+            return missing
+        if job["status"] == "error":
+            return JSONResponse({"error": job["error"]}, status_code=500)
+        if job["status"] != "done":
+            return JSONResponse(manager.describe(job), status_code=409)
+        return JSONResponse({"id": job["id"], "analysis": job["analysis"], **job["result"]})
+
+    async def job_pdf(request: Request):
+        job, missing = _job_or_404(request)
+        if missing:
+            return missing
+        if job["status"] != "done":
+            return JSONResponse(manager.describe(job), status_code=409)
+        # Rendering is CPU-bound; keep it off the event loop.
+        pdf = await run_in_threadpool(manager.pdf_report, job)
+        return Response(pdf, media_type="application/pdf",
+                        headers={"Content-Disposition": f'attachment; filename="{job["id"]}.pdf"'})
+
+    async def health(request: Request):
+        return JSONResponse(manager.health())
+
+    async def metrics(request: Request):
+        return Response(telemetry.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    app = Starlette(routes=[
+        Route("/analyses", list_analyses),
+        Route("/jobs", submit_job, methods=["POST"]),
+        Route("/jobs/{job_id}", job_status),
+        Route("/jobs/{job_id}/result", job_result),
+        Route("/jobs/{job_id}/report.pdf", job_pdf),
+        Route("/healthz", health),
+        Route("/metrics", metrics),
+    ])
+    app.state.manager = manager
+    return app
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve the resume analyses as asynchronous HTTP jobs.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000).")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent analyses (default: {WORKERS}).")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help=f"Unfinished jobs accepted before answering 429 (default: {MAX_PENDING}).")
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(JobManager(args.workers, args.max_pending)), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from io import StringIO
+from lazy_imports import lazy_module
+import telemetry
+
+pd = lazy_module("pandas")
+
+# Bytes of artifacts held in memory across all sessions of this process; older ones spill to disk.
+MEMORY_BYTES = int(float(os.getenv("RESUME_TOOLS_ARTIFACT_MEMORY_MB", 256)) * 1024 * 1024)
+# Bytes of spilled artifacts kept on disk; beyond that the least recently used are deleted.
+DISK_BYTES = int(float(os.getenv("RESUME_TOOLS_ARTIFACT_DISK_MB", 2048)) * 1024 * 1024)
+
+class ArtifactStore:
+    """
+    Content-addressed blob store shared by every session of the process.
+
+    Sessions keep only the returned reference (a SHA-256 of the content), so sessions
+    viewing the same result share one copy. Recently used artifacts live in memory up to
+    `memory_bytes`; the least recently used are then spilled to files under `directory`,
+    which is itself capped at `disk_bytes` with least recently used deletion. `get`
+    returns None for an artifact evicted from both tiers.
+    """
+
+    def __init__(self, directory: str | None = None, memory_bytes: int = MEMORY_BYTES, disk_bytes: int = DISK_BYTES):
+        if directory is None:
+            # Sessions do not survive a restart, so the spill directory belongs to this process only.
+            directory = tempfile.mkdtemp(prefix="resume-tools-artifacts-", dir=os.getenv("RESUME_TOOLS_ARTIFACT_DIR"))
+            atexit.register(shutil.rmtree, directory, True)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        self.stats = {"puts": 0, "deduplicated": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0,
+                      "spilled": 0, "evicted": 0}
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.directory, ref)
+
+    def put(self, data: bytes) -> str:
+        """Stores `data` (once, however many sessions store it) and returns its reference."""
+        ref = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.stats["puts"] += 1
+            if ref in self._memory or ref in self._disk:
+                self.stats["deduplicated"] += 1
+                self._touch(ref)
+                return ref
+            self._memory[ref] = data
+            self._memory_used += len(data)
+            self._shrink_memory()
+        return ref
+
+    def get(self, ref: str | None) -> bytes | None:
+        if ref is None:
+            return None
+        with self._lock:
+            data = self._memory.get(ref)
+            if data is not None:
+                self._memory.move_to_end(ref)
+                self.stats["memory_hits"] += 1
+                return data
+            if ref not in self._disk:
+                self.stats["misses"] += 1
+                return None
+            try:
+                with open(self._path(ref), "rb") as f:
+                    data = f.read()
+            except OSError:
+                self._disk_used -= self._disk.pop(ref)
+                self.stats["misses"] += 1
+                return None
+            # Promote it back to memory; the file stays so a later spill needs no write.
+            self._disk.move_to_end(ref)
+            self._memory[ref] = data
+            self._memory_used += len(data)
+            self.stats["disk_hits"] += 1
+            self._shrink_memory()
+            return data
+
+    def _touch(self, ref: str) -> None:
+        if ref in self._memory:
+            self._memory.move_to_end(ref)
+        if ref in self._disk:
+            self._disk.move_to_end(ref)
+
+    def _shrink_memory(self) -> None:
+        while self._memory_used > self.memory_bytes and self._memory:
+            ref, data = self._memory.popitem(last=False)
+            self._memory_used -= len(data)
+            if ref not in self._disk:
+                with open(self._path(ref), "wb") as f:
+                    f.write(data)
+                self._disk[ref] = len(data)
+                self._disk_used += len(data)
+                self.stats["spilled"] += 1
+        self._shrink_disk()
+
+    def _shrink_disk(self) -> None:
+        while self._disk_used > self.disk_bytes and self._disk:
+            ref, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.remove(self._path(ref))
+            except OSError:
+                pass
+            if ref not in self._memory:
+                self.stats["evicted"] += 1
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode("utf-8"))
+
+    def get_text(self, ref: str | None) -> str | None:
+        data = self.get(ref)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_frame(self, frame: pd.DataFrame) -> str:
+        return self.put_text(frame.to_json(orient="split", force_ascii=False))
+
+    def get_frame(self, ref: str | None) -> pd.DataFrame | None:
+        text = self.get_text(ref)
+        return pd.read_json(StringIO(text), orient="split", dtype=False) if text is not None else None
+
+    def usage(self) -> dict:
+        """Entry counts and bytes per tier, against their caps, plus the event counters."""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_cap_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "disk_cap_bytes": self.disk_bytes,
+                **self.stats,
+            }
+
+    def format_usage(self) -> str:
+        usage = self.usage()
+        return (f"🗄️ Session artifacts: {usage['memory_entries']} in memory "
+                f"({usage['memory_bytes'] / 2 ** 20:.1f} of {usage['memory_cap_bytes'] / 2 ** 20:.0f} MB), "
+                f"{usage['disk_entries']} spilled to disk ({usage['disk_bytes'] / 2 ** 20:.1f} MB), "
+                f"{usage['deduplicated']} shared between sessions, {usage['evicted']} evicted")
+
+def _collect_bytes():
+    usage = artifact_store.usage()
+    return [({"tier": "memory"}, usage["memory_bytes"]), ({"tier": "disk"}, usage["disk_bytes"])]
+
+def _collect_events():
+    usage = artifact_store.usage()
+    return [({"event": event}, usage[event])
+            for event in ("puts", "deduplicated", "memory_hits", "disk_hits", "misses", "spilled", "evicted")]
+
+artifact_store = ArtifactStore()
+telemetry.register_collector("resume_tools_artifact_bytes", "gauge",
+                             "Bytes of session artifacts held per storage tier.", _collect_bytes)
+telemetry.register_collector("resume_tools_artifact_events_total", "counter",
+                             "Session artifact store operations by outcome.", _collect_events)
@@ -0,0 +1,36 @@
+# Prompt templates of the ATS checker, shared by the Streamlit app and the analysis service.
+
+# Bump when any template below changes so cached answers to the old wording are not reused.
+PROMPT_VERSION = "ats-v1"
+
+prompt_templates = {
+    "Similarity Score": """
+        You are an expert ATS. Analyze the resume against the job description.
+        - **Overall Match Score:** Provide a percentage score.
+        - **✅ Skills Matched:** List the key skills found in both the resume and JD.
+        - **❌ Skills Missing:** List critical skills from the JD that are missing in the resume.
+        - **📈 Recommended Additions:** Suggest specific skills or keywords to add.
+        Resume: {resume_text}
+        Job Description: {jd_text}
+        """,
+    "Competency Matrix": """
+        You are an expert ATS. Create a competency matrix comparing the resume to the job description.
+        The output should be a markdown table with the following columns:
+        - Skill/Keyword
+        - Present in Resume (✅/❌)
+        - Competency Rating (1-10)
+        - Suggestion to Improve
+        Resume: {resume_text}
+        Job Description: {jd_text}
+        """,
+    "Improvement Suggestions": """
+        You are an expert career coach. Provide a detailed, bullet-pointed list of suggestions to improve the resume based on the job description.
+        Focus on action verbs, quantifiable achievements, and tailoring.
+        Resume: {resume_text}
+        Job Description: {jd_text}
+        """,
+}
+
+def build_prompt(analysis_type: str, jd_text: str, resume_text: str) -> str:
+    """Fills the template of `analysis_type`; raises KeyError for an unknown analysis."""
+    return prompt_templates[analysis_type].format(jd_text=jd_text, resume_text=resume_text)
@@ -0,0 +1,195 @@
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import telemetry
+
+# Analyses running at once for all app sessions of this process; more wait in the queue.
+WORKERS = int(os.getenv("RESUME_TOOLS_UI_WORKERS", 4))
+# Finished jobs are kept this long (and at most MAX_FINISHED_JOBS of them) so a reloaded page can reattach.
+JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 500
+
+class JobCancelled(Exception):
+    """Raised inside a job at its next checkpoint after the user cancelled it."""
+
+class BackgroundJob:
+    """
+    One analysis running (or waiting to run) on the background executor.
+
+    The job function receives this object and reports through `progress`, which sets the
+    status message and, optionally, the partial result the page shows while polling. It
+    should call `check_cancelled` between steps so a cancellation takes effect promptly.
+    """
+
+    def __init__(self, owner: str, label: str):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.label = label
+        self.status = "queued"
+        self.message = "Waiting for a free worker..."
+        self.partial = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    def progress(self, message: str | None = None, partial: str | None = None) -> None:
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def age(self) -> float:
+        """Seconds since submission, or until it finished."""
+        return (self.finished or time.time()) - self.created
+
+class BackgroundExecutor:
+    """
+    Runs analyses for the app sessions on a shared worker pool, keyed by an owner token.
+
+    The apps use one owner per browser tab, so tabs never cancel or take each other's jobs.
+    A reload starts a new owner, which claims the job the reloaded page left behind with
+    `adopt` instead of paying for the analysis again. Submitting a new job cancels the
+    owner's previous one.
+    """
+
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-analysis")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "done": 0, "error": 0, "cancelled": 0}
+
+    def submit(self, owner: str, label: str, fn, *args, **kwargs) -> BackgroundJob:
+        """Queues `fn(job, *args, **kwargs)`; its return value becomes `job.result`."""
+        previous = self.latest(owner)
+        if previous is not None and previous.active:
+            self.cancel(previous)
+        job = BackgroundJob(owner, label)
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+            self.stats["submitted"] += 1
+        # The job runs in a copy of the caller's context, like the apps' other worker threads.
+        job._future = self._pool.submit(contextvars.copy_context().run, self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: BackgroundJob, fn, args, kwargs) -> None:
+        with self._lock:
+            if job.status != "queued":
+                return  # Cancelled while it waited.
+            job.status, job.started = "running", time.time()
+            job.message = "Starting..."
+        try:
+            with telemetry.trace(job.label):
+                telemetry.record("job_queue_wait", job.started - job.created)
+                job.check_cancelled()
+                with telemetry.span("analysis_total"):
+                    result = fn(job, *args, **kwargs)
+            job.check_cancelled()
+            status, error = "done", None
+        except JobCancelled:
+            result, status, error = None, "cancelled", None
+        except Exception as e:
+            result, status, error = None, "error", str(e)
+        with self._lock:
+            job.result, job.error, job.status, job.finished = result, error, status, time.time()
+            self.stats[status] += 1
+
+    def cancel(self, job: BackgroundJob) -> None:
+        """Stops a queued job at once and a running one at its next checkpoint."""
+        job._cancel.set()
+        with self._lock:
+            if job.status == "queued":
+                job.status, job.finished = "cancelled", time.time()
+                self.stats["cancelled"] += 1
+                if job._future is not None:
+                    job._future.cancel()
+
+    def get(self, job_id: str | None) -> BackgroundJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, owner: str) -> BackgroundJob | None:
+        """The owner's most recent job that is still kept, running or finished."""
+        with self._lock:
+            self._expire()
+            for job in reversed(self._jobs.values()):
+                if job.owner == owner:
+                    return job
+        return None
+
+    def adopt(self, previous_owner: str, owner: str) -> BackgroundJob | None:
+        """Hands `previous_owner`'s latest job, running or finished, to `owner` and returns it."""
+        with self._lock:
+            self._expire()
+            for job in reversed(self._jobs.values()):
+                if job.owner == previous_owner:
+                    job.owner = owner
+                    return job
+        return None
+
+    def queue_position(self, job: BackgroundJob) -> int | None:
+        with self._lock:
+            if job.status != "queued":
+                return None
+            queued = [other for other in self._jobs.values() if other.status == "queued"]
+        return queued.index(job) + 1
+
+    def _expire(self) -> None:
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished > JOB_TTL_SECONDS:
+                del self._jobs[job.id]
+
+    def load(self) -> dict:
+        """Queue depth and the age of the oldest waiting and running job, for sizing the pool."""
+        now = time.time()
+        with self._lock:
+            queued = [now - job.created for job in self._jobs.values() if job.status == "queued"]
+            running = [now - job.started for job in self._jobs.values() if job.status == "running"]
+            stats = dict(self.stats)
+        return {"workers": self.workers, "queued": len(queued), "running": len(running),
+                "oldest_queued_seconds": max(queued, default=0.0), "oldest_running_seconds": max(running, default=0.0),
+                **stats}
+
+    def format_load(self) -> str:
+        load = self.load()
+        return (f"🧵 Background analyses: {load['running']}/{load['workers']} workers busy, {load['queued']} queued "
+                f"(oldest waiting {load['oldest_queued_seconds']:.0f}s, longest running {load['oldest_running_seconds']:.0f}s)")
+
+def _collect_load():
+    load = background_jobs.load()
+    return [({"state": "queued"}, load["queued"]), ({"state": "running"}, load["running"])]
+
+def _collect_age():
+    load = background_jobs.load()
+    return [({"state": "queued"}, round(load["oldest_queued_seconds"], 3)),
+            ({"state": "running"}, round(load["oldest_running_seconds"], 3))]
+
+background_jobs = BackgroundExecutor()
+telemetry.register_collector("resume_tools_ui_jobs", "gauge", "App analyses by state.", _collect_load)
+telemetry.register_collector("resume_tools_ui_job_oldest_seconds", "gauge",
+                             "Age of the oldest app analysis in each state.", _collect_age)
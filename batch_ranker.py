@@ -0,0 +1,315 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pdf_extract import document_text, extract_document, extract_text
+from gemini_client import get_model
+from competency_analysis import PROMPT_VERSION, analyze_competency
+from jd_dedup import find_reusable
+from resume_packing import analyze_pack, is_cached, plan_packs
+from model_scheduler import BATCH
+from linkedin_scraper import get_jd_from_linkedin
+from local_scorer import shortlist
+from text_preprocess import prepare_inputs
+from report_generator import write_candidate_reports
+
+RESULTS_FILE = "results.jsonl"
+RANKING_CSV = "ranking.csv"
+RANKING_JSONL = "ranking.jsonl"
+MATRIX_DIR = "matrices"
+REPORTS_ZIP = "reports.zip"
+
+def load_job_description(text: str | None = None, pdf_path: str | None = None, linkedin_url: str | None = None) -> str:
+    """Resolves the job description from exactly one of pasted text, a PDF or a LinkedIn URL."""
+    if text:
+        return text
+    if pdf_path:
+        return extract_text(pdf_path)
+    if linkedin_url:
+        jd = get_jd_from_linkedin(linkedin_url)
+        if not jd:
+            raise ValueError(f"Could not extract a job description from {linkedin_url}")
+        return jd
+    raise ValueError("A job description is required.")
+
+def candidate_id(path: str, data: bytes) -> str:
+    """Identifies a resume by file name and content, so renamed or edited files are re-analyzed."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha256(data).hexdigest()[:12]}"
+
+def load_checkpoint(out_dir: str, jd_hash: str) -> dict:
+    """Returns the finished candidates recorded by an earlier run against the same job description."""
+    done = {}
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A crash can leave a truncated last line behind.
+            if record.get("jd_hash") == jd_hash and record.get("status") == "ok":
+                done[record["candidate_id"]] = record
+    return done
+
+def analyze_resume(model, jd_text: str, resume_text: str, use_cache: bool = True) -> dict:
+    """Runs the competency-mapping prompt for one resume and returns a JSON-serialisable result."""
+    jd_text, resume_text, token_stats = prepare_inputs(jd_text, resume_text)
+    # Batch work yields to interactive app requests sharing this process's model quota.
+    result = analyze_competency(model, jd_text, resume_text, use_cache=use_cache, priority=BATCH,
+                                reuse_similar_jd=use_cache)
+    return _result_record(result, token_stats)
+
+def _result_record(result: dict, token_stats: dict) -> dict:
+    return {
+        "match_score": result["report"]["overall_match_score"],
+        "report": result["report_text"],
+        "competency_matrix": result["dataframe"].astype(str).to_dict(orient="records"),
+        "repairs": result["repairs"],
+        # Set when the result was reused from a near-identical job description analyzed earlier.
+        "reused_jd_similarity": result["reused"]["similarity"] if result["reused"] else None,
+        "tokens_before": token_stats["tokens_before"],
+        "tokens_after": token_stats["tokens_after"],
+    }
+
+def read_resume(path: str) -> tuple[bytes, str]:
+    """Returns the raw bytes and extracted text of a resume PDF; the text is empty if parsing fails."""
+    data, text, _ = _read_resume_document(path)
+    return data, text
+
+def _read_resume_document(path: str) -> tuple[bytes, str, str | None]:
+    """Like read_resume, plus the extraction status; the status is None if the PDF could not be read."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        document = extract_document(data)
+    except Exception:
+        return data, "", None
+    return data, document_text(document), document["status"]
+
+def _process(model, jd_text: str, path: str, use_cache: bool, resume_text: str | None = None,
+             pdf_status: str | None = None) -> dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    record = {"candidate_id": candidate_id(path, data), "file": os.path.basename(path)}
+    started = time.perf_counter()
+    try:
+        if resume_text is None or pdf_status is None:
+            # Not read earlier in the run (or unreadable then): extract now, so errors land in this record.
+            document = extract_document(data)
+            pdf_status = document["status"]
+            if resume_text is None:
+                resume_text = document_text(document)
+        # Anything but "ok" means the PDF hit an extraction limit and was only partly read.
+        record["pdf_status"] = pdf_status
+        if not resume_text.strip():
+            raise ValueError("Could not extract text from resume.")
+        record.update(analyze_resume(model, jd_text, resume_text, use_cache=use_cache), status="ok")
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+def _process_pack(model, jd_text: str, paths: list[str], resume_texts: dict, pdf_statuses: dict,
+                  use_cache: bool) -> list[dict]:
+    """
+    Analyzes several resumes in one packed model call and returns one record per resume, in order.
+
+    The resumes were already extracted when the packs were planned, so their text and
+    extraction status are passed in rather than read from the PDFs again.
+    """
+    records = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        records.append({"candidate_id": candidate_id(path, data), "file": os.path.basename(path),
+                        "pdf_status": pdf_statuses.get(path)})
+    started = time.perf_counter()
+    try:
+        prepared = [prepare_inputs(jd_text, resume_texts[path]) for path in paths]
+        results = analyze_pack(model, prepared[0][0], [resume for _, resume, _ in prepared], use_cache=use_cache,
+                               priority=BATCH)
+        for record, result, (_, _, token_stats) in zip(records, results, prepared):
+            record.update(_result_record(result, token_stats), status="ok", pack_size=result["packing"]["pack_size"],
+                          tokens_saved=result["packing"]["tokens_saved"])
+    except Exception as e:
+        for record in records:
+            record.update(status="error", error=str(e))
+    for record in records:
+        record["seconds"] = round(time.perf_counter() - started, 3)
+    return records
+
+def _plan_batches(model, jd_text: str, paths: list[str], resume_texts: dict,
+                  use_cache: bool) -> tuple[list[list[str]], dict]:
+    """
+    Groups resumes for packed analysis. Resumes whose answer is already cached (exactly, or
+    under a near-identical job description), that have no text, or that the token budget and
+    pack size leave alone in a pack come back as batches of one and are analyzed on their own.
+    Also returns how many resumes went alone for each reason.
+    """
+    singles, packable, prepared = [], [], {}
+    alone = {"cached": 0, "no_text": 0, "unpaired": 0}
+    for path in paths:
+        jd_prepared, resume, _ = prepare_inputs(jd_text, resume_texts[path])
+        if not resume.strip():
+            alone["no_text"] += 1
+            singles.append([path])
+        elif use_cache and (is_cached(model, jd_prepared, resume)
+                            or find_reusable(jd_prepared, resume, PROMPT_VERSION) is not None):
+            # Served from the response cache or from a near-identical job description, as an unpacked run would.
+            alone["cached"] += 1
+            singles.append([path])
+        else:
+            packable.append(path)
+            prepared[path] = resume
+    if not packable:
+        return singles, alone
+    packs = [[packable[i] for i in pack] for pack in plan_packs(jd_prepared, [prepared[path] for path in packable])]
+    alone["unpaired"] = sum(1 for pack in packs if len(pack) == 1)
+    return singles + packs, alone
+
+def write_outputs(out_dir: str, records: list[dict]) -> list[dict]:
+    """Writes the ranked CSV/JSONL and one competency-matrix CSV per candidate; unscored ones (errors, skipped) rank last."""
+    ranked = sorted(records, key=lambda r: (r.get("match_score") is None, -(r.get("match_score") or 0), -(r.get("local_score") or 0)))
+    os.makedirs(os.path.join(out_dir, MATRIX_DIR), exist_ok=True)
+    with open(os.path.join(out_dir, RANKING_CSV), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "candidate_id", "file", "status", "match_score", "local_score", "matrix_file", "error"])
+        for rank, record in enumerate(ranked, 1):
+            matrix_file = os.path.join(MATRIX_DIR, f"{record['candidate_id']}.csv")
+            rows = record.get("competency_matrix") or []
+            if rows:
+                with open(os.path.join(out_dir, matrix_file), "w", newline="", encoding="utf-8") as mf:
+                    matrix_writer = csv.DictWriter(mf, fieldnames=list(rows[0].keys()))
+                    matrix_writer.writeheader()
+                    matrix_writer.writerows(rows)
+            if not rows:
+                matrix_file = ""
+            writer.writerow([rank, record["candidate_id"], record["file"], record["status"],
+                             record.get("match_score"), record.get("local_score"), matrix_file, record.get("error", "")])
+    with open(os.path.join(out_dir, RANKING_JSONL), "w", encoding="utf-8") as f:
+        for rank, record in enumerate(ranked, 1):
+            f.write(json.dumps({"rank": rank, **record}, ensure_ascii=False) + "\n")
+    return ranked
+
+def rank_resumes(jd_text: str, resume_dir: str, out_dir: str, workers: int = 4, use_cache: bool = True,
+                 model=None, top_k: int | None = None, pack: bool = False) -> list[dict]:
+    """
+    Analyzes every PDF in `resume_dir` against one job description and writes a ranking to `out_dir`.
+
+    Each finished candidate is appended to results.jsonl as soon as it completes, so an
+    interrupted run picks up where it stopped without calling the model again for them.
+    With `top_k`, resumes are first scored locally and only the best `top_k` are sent to the model.
+    With `pack`, several resumes share one prompt (and one copy of the job description) up to a
+    token budget, and each record reports the input tokens it saved.
+    """
+    model = model or get_model()
+    os.makedirs(out_dir, exist_ok=True)
+    jd_hash = hashlib.sha256(jd_text.encode("utf-8")).hexdigest()
+    done = load_checkpoint(out_dir, jd_hash)
+
+    paths = sorted(
+        os.path.join(resume_dir, name) for name in os.listdir(resume_dir) if name.lower().endswith(".pdf")
+    )
+    resume_texts, pdf_statuses, local_scores, skipped = {}, {}, {}, []
+    if top_k is not None and len(paths) > top_k:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            loaded = dict(zip(paths, pool.map(_read_resume_document, paths)))
+        keep, scores = shortlist(jd_text, [loaded[path][1] for path in paths], top_k)
+        local_scores = {path: score["score"] for path, score in zip(paths, scores)}
+        kept = {paths[i] for i in keep}
+        for path in paths:
+            if path not in kept:
+                skipped.append({"candidate_id": candidate_id(path, loaded[path][0]), "file": os.path.basename(path),
+                                "status": "skipped", "match_score": None, "local_score": local_scores[path]})
+        paths = [path for path in paths if path in kept]
+        resume_texts = {path: loaded[path][1] for path in paths}
+        pdf_statuses = {path: loaded[path][2] for path in paths}
+        print(f"Local pre-scoring kept {len(paths)} of {len(loaded)} resumes for AI analysis.")
+
+    pending = []
+    for path in paths:
+        with open(path, "rb") as f:
+            cid = candidate_id(path, f.read())
+        if cid in done:
+            done[cid]["local_score"] = local_scores.get(path, done[cid].get("local_score"))
+        else:
+            pending.append(path)
+    print(f"{len(paths)} resumes selected, {len(paths) - len(pending)} already analyzed, {len(pending)} to go.")
+
+    with open(os.path.join(out_dir, RESULTS_FILE), "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        if pack:
+            unread = [path for path in pending if path not in resume_texts]
+            for path, (_, text, status) in zip(unread, pool.map(_read_resume_document, unread)):
+                resume_texts[path], pdf_statuses[path] = text, status
+            batches, alone = _plan_batches(model, jd_text, pending, resume_texts, use_cache)
+            packed = [batch for batch in batches if len(batch) > 1]
+            labels = {"cached": "already cached", "no_text": "without text",
+                      "unpaired": "left alone by the token budget or pack size"}
+            reasons = ", ".join(f"{count} {labels[reason]}" for reason, count in alone.items() if count)
+            print(f"Packing {sum(map(len, packed))} resumes into {len(packed)} prompts; "
+                  f"{len(batches) - len(packed)} are analyzed on their own" + (f" ({reasons})." if reasons else "."))
+        else:
+            batches = [[path] for path in pending]
+        futures = {
+            (pool.submit(_process, model, jd_text, batch[0], use_cache, resume_texts.get(batch[0]),
+                         pdf_statuses.get(batch[0])) if len(batch) == 1
+             else pool.submit(_process_pack, model, jd_text, batch, resume_texts, pdf_statuses, use_cache)): batch
+            for batch in batches
+        }
+        i, saved, failed = 0, [], {}
+        for future in as_completed(futures):
+            result = future.result()
+            for path, record in zip(futures[future], result if isinstance(result, list) else [result]):
+                i += 1
+                record = {"jd_hash": jd_hash, **record}
+                if path in local_scores:
+                    record["local_score"] = local_scores[path]
+                checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                checkpoint.flush()
+                if record["status"] == "ok":
+                    done[record["candidate_id"]] = record
+                    if "tokens_saved" in record:
+                        saved.append(record["tokens_saved"])
+                    print(f"[{i}/{len(pending)}] {record['file']}: {record.get('match_score')}")
+                else:
+                    failed[record["candidate_id"]] = record
+                    print(f"[{i}/{len(pending)}] {record['file']}: FAILED ({record['error']})", file=sys.stderr)
+        if saved:
+            print(f"Packing saved ~{sum(saved)} input tokens ({sum(saved) / len(saved):.0f} per packed candidate).")
+
+    # Failed candidates stay in the ranking (status "error"), so every input file is accounted for.
+    return write_outputs(out_dir, list(done.values()) + list(failed.values()) + skipped)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a directory of resume PDFs against one job description.")
+    jd_group = parser.add_mutually_exclusive_group(required=True)
+    jd_group.add_argument("--jd-text", help="Job description text.")
+    jd_group.add_argument("--jd-pdf", help="Path to a job description PDF.")
+    jd_group.add_argument("--jd-url", help="LinkedIn job posting URL.")
+    parser.add_argument("resume_dir", help="Directory containing resume PDFs.")
+    parser.add_argument("--out", default="batch_output", help="Output directory (default: batch_output).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent model calls (default: 4).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache.")
+    parser.add_argument("--top-k", type=int, help="Only send the K best locally pre-scored resumes to the model.")
+    parser.add_argument("--reports", action="store_true", help="Also write one PDF report per candidate to reports.zip.")
+    parser.add_argument("--pack", action="store_true",
+                        help="Send several resumes per prompt, so the job description is sent once per pack.")
+    args = parser.parse_args(argv)
+
+    jd_text = load_job_description(args.jd_text, args.jd_pdf, args.jd_url)
+    ranked = rank_resumes(jd_text, args.resume_dir, args.out, workers=args.workers, use_cache=not args.no_cache,
+                          top_k=args.top_k, pack=args.pack)
+    print(f"Ranking of {len(ranked)} candidates written to {os.path.join(args.out, RANKING_CSV)}")
+    if args.reports:
+        count = write_candidate_reports(ranked, os.path.join(args.out, REPORTS_ZIP))
+        print(f"{count} PDF reports written to {os.path.join(args.out, REPORTS_ZIP)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# The benchmark measures the pipeline, not the model quota, so lift the scheduler's limits
+# (the project modules read these on import) unless they are set explicitly.
+os.environ.setdefault("RESUME_TOOLS_MODEL_RPM", "1000000")
+os.environ.setdefault("RESUME_TOOLS_MODEL_TPM", "1000000000")
+
+RESULTS_FILE = "benchmark_results.json"
+BASELINE_FILE = "benchmark_baseline.json"
+# A stage regresses when its median is this much slower than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and at least this many milliseconds slower, so sub-millisecond noise never fails a run.
+MIN_REGRESSION_MS = 2.0
+
+# Page counts of the generated resumes and word counts of the generated job descriptions.
+FIXTURE_SIZES = {"small": (1, 150), "medium": (4, 600), "large": (20, 2000)}
+
+FILLER_WORDS = (
+    "designed built maintained migrated automated improved delivered led mentored reduced increased "
+    "service pipeline platform dashboard api latency cost reliability customers team project release "
+    "data model report analysis workflow integration testing deployment monitoring infrastructure"
+).split()
+
+def _sentence(rng: random.Random, skills: list[str], words: int = 14) -> str:
+    picked = [rng.choice(FILLER_WORDS) for _ in range(words)]
+    picked[rng.randrange(words)] = rng.choice(skills)
+    return " ".join(picked).capitalize() + "."
+
+def make_job_description(words: int, seed: int = 0) -> str:
+    """Generates a job description of roughly `words` words, including the usual posting boilerplate."""
+    from fake_model import SKILL_WORDS
+    rng = random.Random(seed)
+    skills = rng.sample(SKILL_WORDS, 10)
+    lines = ["Senior Software Engineer", "Requirements:"] + [f"- {skill} experience" for skill in skills]
+    while sum(len(line.split()) for line in lines) < words:
+        lines.append(_sentence(rng, skills))
+    lines.append("We are an equal opportunity employer and value diversity.")
+    return "\n".join(lines)
+
+def make_resume_pdf(pages: int, seed: int = 0) -> bytes:
+    """Generates a text resume PDF with `pages` pages; different seeds give different bytes."""
+    from fpdf import FPDF
+    from fake_model import SKILL_WORDS
+    rng = random.Random(seed)
+    skills = rng.sample(SKILL_WORDS, 12)
+    pdf = FPDF()
+    pdf.set_auto_page_break(False)
+    for page in range(pages):
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 14)
+        pdf.cell(0, 10, f"Candidate {seed} - page {page + 1}", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", size=10)
+        pdf.multi_cell(0, 5, "Skills: " + ", ".join(skills), new_x="LMARGIN", new_y="NEXT")
+        for _ in range(22):
+            pdf.multi_cell(0, 5, _sentence(rng, skills), new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output())
+
+def _competency_frame(run: int):
+    """A competency matrix whose ratings change with `run`, so chart memoization never kicks in."""
+    import pandas as pd
+    from competency_analysis import MATRIX_COLUMNS
+    from fake_model import SKILL_WORDS
+    rng = random.Random(run)
+    rows = [[skill, "✅" if rng.random() < 0.6 else "❌", rng.randint(1, 10), f"Show {skill} in a project."]
+            for skill in SKILL_WORDS[:12]]
+    return pd.DataFrame(rows, columns=MATRIX_COLUMNS)
+
+def _summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+def _time_stage(work, repeat: int) -> dict:
+    """Calls `work(run)` once to warm up, then `repeat` more times, and summarizes the timings in milliseconds."""
+    work(-1)
+    samples = []
+    for run in range(repeat):
+        started = time.perf_counter()
+        work(run)
+        samples.append((time.perf_counter() - started) * 1000)
+    return _summarize(samples)
+
+def run_benchmarks(repeat: int = 5, latency: float = 0.0, sizes: list[str] | None = None) -> dict:
+    """
+    Times every pipeline stage offline and returns the results as a JSON-serializable dict.
+
+    Each timed run gets fresh input (a new PDF, a new chart dataframe, a new report text), so
+    the stages measure real work rather than the memory and disk caches. Model calls go to
+    the fake model with `latency` seconds per call.
+    """
+    from pdf_extract import extract_text
+    from text_preprocess import prepare_inputs
+    from competency_analysis import build_prompt, parse_structured, matrix_to_dataframe, report_to_markdown, analyze_competency
+    from report_generator import create_radar_chart, create_bar_chart, create_pdf_report
+    from fake_model import FakeModel
+
+    model = FakeModel(latency=latency)
+    stages = {}
+    for size in sizes or list(FIXTURE_SIZES):
+        pages, jd_words = FIXTURE_SIZES[size]
+        print(f"Generating {size} fixtures ({pages} pages, {jd_words}-word job description)...")
+        jd_text = make_job_description(jd_words, seed=pages)
+        pdfs = {run: make_resume_pdf(pages, seed=1000 * pages + run + 1) for run in range(-1, repeat)}
+        resume_text = extract_text(pdfs[-1])
+        answer = model.answer(build_prompt(jd_text, resume_text))
+
+        stages[f"pdf_extraction[{size}]"] = _time_stage(lambda run: extract_text(pdfs[run]), repeat)
+        stages[f"prompt_building[{size}]"] = _time_stage(
+            lambda run: build_prompt(*prepare_inputs(jd_text, resume_text)[:2]), repeat)
+
+        def parse(run):
+            sections, errors = parse_structured(answer)
+            matrix_to_dataframe(sections["competency_matrix"])
+            report_to_markdown(sections["report"])
+        stages[f"response_parsing[{size}]"] = _time_stage(parse, repeat)
+        stages[f"analysis_end_to_end[{size}]"] = _time_stage(
+            lambda run: analyze_competency(model, jd_text, resume_text, use_cache=False), repeat)
+
+    print("Timing charts and PDF reports...")
+    frames = {run: _competency_frame(run) for run in range(-1, repeat)}
+    stages["radar_chart"] = _time_stage(lambda run: create_radar_chart(frames[run]), repeat)
+    stages["bar_chart"] = _time_stage(lambda run: create_bar_chart(frames[run]), repeat)
+    radar, bar = create_radar_chart(frames[-1]), create_bar_chart(frames[-1])
+    report_text = report_to_markdown(parse_structured(answer)[0]["report"])
+    stages["pdf_report"] = _time_stage(
+        lambda run: create_pdf_report(f"{report_text}\nRun {run}", frames[-1], radar, bar), repeat)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"repeat": repeat, "latency": latency},
+        "stages": stages,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            min_delta_ms: float = MIN_REGRESSION_MS) -> list[str]:
+    """Returns one message per stage whose median regressed past `threshold` relative to the baseline."""
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = results["stages"].get(stage)
+        if current is None:
+            continue
+        limit = base["median_ms"] * (1 + threshold)
+        if current["median_ms"] > limit and current["median_ms"] - base["median_ms"] >= min_delta_ms:
+            regressions.append(f"{stage}: {current['median_ms']:.1f} ms vs baseline {base['median_ms']:.1f} ms "
+                               f"(+{100 * (current['median_ms'] / base['median_ms'] - 1):.0f}%)")
+    return regressions
+
+def format_results(results: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'stage':<34}{'median ms':>12}{'p95 ms':>10}{'baseline':>12}"]
+    for stage, stats in results["stages"].items():
+        base = (baseline or {}).get("stages", {}).get(stage)
+        base_ms = f"{base['median_ms']:.1f}" if base else "-"
+        lines.append(f"{stage:<34}{stats['median_ms']:>12.1f}{stats['p95_ms']:>10.1f}{base_ms:>12}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline pipeline benchmarks against a fake model.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage (default: 5).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per fake model call (default: 0).")
+    parser.add_argument("--sizes", nargs="+", choices=list(FIXTURE_SIZES), help="Fixture sizes to run (default: all).")
+    parser.add_argument("--out", default=RESULTS_FILE, help=f"Where to write the results (default: {RESULTS_FILE}).")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help=f"Baseline to compare against (default: {BASELINE_FILE}).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown per stage as a fraction (default: {DEFAULT_THRESHOLD}).")
+    args = parser.parse_args(argv)
+
+    # Keep the benchmark's caches away from the real ones; the project modules read this on import.
+    os.environ["RESUME_TOOLS_CACHE_DIR"] = tempfile.mkdtemp(prefix="resume-tools-bench-")
+    results = run_benchmarks(args.repeat, args.latency, args.sizes)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Regressions against the baseline:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"No stage regressed by more than {args.threshold:.0%}.")
+
+if __name__ == "__main__":
+    main()
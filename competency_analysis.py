@@ -0,0 +1,269 @@
+from __future__ import annotations
+import json
+import re
+import threading
+from gemini_client import generate_text, cache_answer
+from model_scheduler import INTERACTIVE
+from jd_dedup import find_reusable, remember_result
+from lazy_imports import lazy_module
+import telemetry
+
+pd = lazy_module("pandas")
+
+# Bump when the template below changes so cached answers to the old wording are not reused.
+PROMPT_VERSION = "competency-v2-json"
+
+MATRIX_COLUMNS = ["Skill/Keyword", "Present in Resume (✅/❌)", "Competency Rating (1-10)", "Suggestion to Improve"]
+JSON_CONFIG = {"response_mime_type": "application/json"}
+
+SECTION_SCHEMAS = {
+    "competency_matrix": """"competency_matrix": [
+    {"skill": "<skill or keyword from the JD>", "present": <true|false>, "rating": <integer 1-10>, "suggestion": "<how to improve>"}
+  ]""",
+    "report": """"report": {
+    "overall_match_score": <integer 0-100>,
+    "top_matched_skills": ["<up to 5 skills>"],
+    "top_missing_skills": ["<up to 5 skills>"],
+    "industry_benchmark_score": <integer 0-100>,
+    "ai_tip": "<a single, actionable tip>",
+    "final_review": "<a summary paragraph>"
+  }""",
+}
+SCHEMA_DESCRIPTION = "{\n  " + ",\n  ".join(SECTION_SCHEMAS.values()) + "\n}"
+
+prompt_template = """
+You are an expert ATS and career strategist. Your task is to perform a complete competency mapping of a resume against a job description.
+Respond with a single JSON object, and nothing else, that follows this schema:
+{schema}
+- "competency_matrix" lists every important skill or keyword from the job description.
+- "industry_benchmark_score" is the typical match for this kind of role (e.g., 75 for a senior role in tech).
+
+**Input:**
+
+**Job Description:**
+{jd_text}
+
+**Resume:**
+{resume_text}
+
+**Output:**
+"""
+
+repair_template = """
+You are an expert ATS and career strategist. An earlier answer for the competency mapping below had an invalid "{section}" section:
+{errors}
+
+Respond with a single JSON object containing only the "{section}" key, following this schema:
+{schema}
+
+**Job Description:**
+{jd_text}
+
+**Resume:**
+{resume_text}
+
+**Output:**
+"""
+
+# Counters for answers that failed validation and for the extra calls spent repairing them.
+structured_output_stats = {"answers": 0, "parse_failures": 0, "repair_calls": 0, "repaired": 0, "unrepaired": 0}
+_stats_lock = threading.Lock()
+
+def _count(**increments) -> None:
+    with _stats_lock:
+        for name, value in increments.items():
+            structured_output_stats[name] += value
+
+def build_prompt(jd_text: str, resume_text: str) -> str:
+    return prompt_template.format(schema=SCHEMA_DESCRIPTION, jd_text=jd_text, resume_text=resume_text)
+
+def _load_json(text: str):
+    """Parses the answer as JSON, tolerating code fences and text around the object."""
+    text = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", text or "")
+    start = text.find("{")
+    if start < 0:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text[start:])[0]
+    except json.JSONDecodeError:
+        return None
+
+def _salvage_section(text: str, section: str):
+    """Recovers one section from an answer whose overall JSON is broken (e.g. truncated)."""
+    match = re.search(rf'"{section}"\s*:\s*', text or "")
+    if not match:
+        return None
+    try:
+        return json.JSONDecoder().raw_decode(text[match.end():])[0]
+    except json.JSONDecodeError:
+        return None
+
+def _as_int(value, low: int, high: int) -> int | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        found = re.search(r"-?\d+(?:\.\d+)?", value)
+        value = float(found.group()) if found else None
+    if isinstance(value, (int, float)):
+        return int(round(min(max(value, low), high)))
+    return None
+
+def _as_present(value) -> bool | None:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("✅", "yes", "true", "y"):
+            return True
+        if lowered in ("❌", "no", "false", "n"):
+            return False
+    return None
+
+def validate_matrix(value) -> tuple[list[dict], list[str]]:
+    """Returns the valid matrix rows and a list of problems. Rows without a skill or rating are dropped."""
+    if not isinstance(value, list):
+        return [], ["competency_matrix must be a list of objects"]
+    rows, errors = [], []
+    for i, item in enumerate(value):
+        if not isinstance(item, dict):
+            errors.append(f"competency_matrix[{i}] is not an object")
+            continue
+        skill = str(item.get("skill") or "").strip()
+        rating = _as_int(item.get("rating"), 1, 10)
+        present = _as_present(item.get("present"))
+        if not skill or rating is None or present is None:
+            errors.append(f"competency_matrix[{i}] needs a non-empty skill, a boolean present and a 1-10 rating")
+            continue
+        rows.append({"skill": skill, "present": present, "rating": rating, "suggestion": str(item.get("suggestion") or "")})
+    if not rows:
+        errors.append("competency_matrix has no valid rows")
+    return rows, errors
+
+def validate_report(value) -> tuple[dict, list[str]]:
+    """Returns the normalized report fields and a list of problems."""
+    if not isinstance(value, dict):
+        return {}, ["report must be an object"]
+    errors = []
+    report = {}
+    for field in ("overall_match_score", "industry_benchmark_score"):
+        report[field] = _as_int(value.get(field), 0, 100)
+        if report[field] is None:
+            errors.append(f"report.{field} must be an integer from 0 to 100")
+    for field in ("top_matched_skills", "top_missing_skills"):
+        items = value.get(field)
+        if not isinstance(items, list):
+            errors.append(f"report.{field} must be a list of strings")
+            items = []
+        report[field] = [str(item) for item in items][:5]
+    for field in ("ai_tip", "final_review"):
+        report[field] = str(value.get(field) or "").strip()
+        if not report[field]:
+            errors.append(f"report.{field} must be a non-empty string")
+    return report, errors
+
+_VALIDATORS = {"competency_matrix": validate_matrix, "report": validate_report}
+
+def parse_structured(text: str) -> tuple[dict, dict]:
+    """
+    Validates a JSON answer section by section.
+
+    Returns (sections, errors): the valid sections keyed by name, and the problems of every
+    section that is missing or invalid, so callers can repair just those.
+    """
+    data = _load_json(text)
+    return validate_sections({section: data.get(section) if isinstance(data, dict) else _salvage_section(text, section)
+                              for section in _VALIDATORS})
+
+def validate_sections(values: dict) -> tuple[dict, dict]:
+    """Validates decoded section values (missing ones absent or None); returns (sections, errors) like `parse_structured`."""
+    sections, errors = {}, {}
+    for section, validator in _VALIDATORS.items():
+        value = values.get(section)
+        if value is None:
+            errors[section] = [f'"{section}" is missing or is not valid JSON']
+            continue
+        parsed, problems = validator(value)
+        # A matrix with some unusable rows is still usable; a report must be complete.
+        invalid = not parsed if section == "competency_matrix" else bool(problems)
+        if invalid:
+            errors[section] = problems
+        else:
+            sections[section] = parsed
+    return sections, errors
+
+def matrix_to_dataframe(rows: list[dict]) -> pd.DataFrame:
+    """Builds the competency DataFrame in the column layout the charts and PDF report expect."""
+    return pd.DataFrame(
+        [[row["skill"], "✅" if row["present"] else "❌", row["rating"], row["suggestion"]] for row in rows],
+        columns=MATRIX_COLUMNS,
+    )
+
+def report_to_markdown(report: dict) -> str:
+    matched = "\n".join(f"  - {skill}" for skill in report["top_matched_skills"]) or "  - None"
+    missing = "\n".join(f"  - {skill}" for skill in report["top_missing_skills"]) or "  - None"
+    return (
+        f"- **Overall Resume Match Score:** {report['overall_match_score']}%\n"
+        f"- **Top 5 Matched Skills:**\n{matched}\n"
+        f"- **Top 5 Missing Skills:**\n{missing}\n"
+        f"- **Industry Benchmark Score:** {report['industry_benchmark_score']}%\n"
+        f"- **Personalized AI Tip of the Day:** {report['ai_tip']}\n"
+        f"- **Final Review:** {report['final_review']}"
+    )
+
+def result_from_sections(sections: dict, repairs: int = 0, reused: dict | None = None) -> dict:
+    return {
+        "dataframe": matrix_to_dataframe(sections["competency_matrix"]),
+        "report_text": report_to_markdown(sections["report"]),
+        "report": sections["report"],
+        "repairs": repairs,
+        "sections": sections,
+        "reused": reused,
+    }
+
+def analyze_competency(model, jd_text: str, resume_text: str, use_cache: bool = True, timeout: int = 180,
+                       priority: int = INTERACTIVE, reuse_similar_jd: bool = False) -> dict:
+    """
+    Runs the competency-mapping prompt and validates the JSON answer against the schema.
+
+    When a section fails validation, only that section is requested again (once). Returns a
+    dict with the DataFrame, the markdown report, the report fields, the validated sections
+    and the number of repair calls made. Raises ValueError if the answer cannot be repaired;
+    API errors propagate.
+
+    With `reuse_similar_jd`, an earlier result for the same resume against a near-identical
+    job description is returned instead, with `reused` describing where it came from.
+    """
+    if reuse_similar_jd:
+        reuse = find_reusable(jd_text, resume_text, PROMPT_VERSION)
+        if reuse:
+            return result_from_sections(json.loads(reuse.pop("result")), reused=reuse)
+
+    prompt = build_prompt(jd_text, resume_text)
+    answer = generate_text(model, prompt, PROMPT_VERSION, timeout=timeout, use_cache=use_cache,
+                           validate=lambda text: not parse_structured(text)[1], generation_config=JSON_CONFIG,
+                           priority=priority)
+    with telemetry.span("response_parsing"):
+        sections, errors = parse_structured(answer)
+    _count(answers=1, parse_failures=1 if errors else 0)
+
+    repairs = 0
+    for section, problems in errors.items():
+        repair_prompt = repair_template.format(section=section, errors="\n".join(f"- {p}" for p in problems),
+                                               schema="{\n  " + SECTION_SCHEMAS[section] + "\n}", jd_text=jd_text, resume_text=resume_text)
+        repairs += 1
+        _count(repair_calls=1)
+        repaired = generate_text(model, repair_prompt, PROMPT_VERSION, timeout=timeout, use_cache=use_cache,
+                                 validate=lambda text, s=section: s not in parse_structured(text)[1],
+                                 generation_config=JSON_CONFIG, priority=priority)
+        fixed, still_broken = parse_structured(repaired)
+        if section in still_broken:
+            _count(unrepaired=1)
+            raise ValueError(f"The model returned an invalid '{section}' section: {'; '.join(still_broken[section])}")
+        sections[section] = fixed[section]
+        _count(repaired=1)
+
+    if repairs:
+        # Store the merged answer so the next identical request needs no repair round trip.
+        cache_answer(model, prompt, PROMPT_VERSION, json.dumps(sections, ensure_ascii=False))
+    remember_result(jd_text, resume_text, PROMPT_VERSION, json.dumps(sections, ensure_ascii=False))
+    return result_from_sections(sections, repairs)
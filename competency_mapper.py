@@ -1,67 +1,85 @@
 import streamlit as st
-import pandas as pd
 from linkedin_scraper import get_jd_from_linkedin
-from PyPDF2 import PdfReader
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+from pdf_extract import document_text, extract_document, format_extraction_notice
 from report_generator import create_radar_chart, create_bar_chart, create_pdf_report
-from io import StringIO
+from gemini_client import MODEL_NAME, get_model, response_cache
+from competency_analysis import analyze_competency, structured_output_stats
+from text_preprocess import prepare_inputs, format_token_stats
+from model_scheduler import scheduler
+from jd_dedup import format_reuse_notice
+from resume_sections import analyze_by_section, format_section_stats
+from artifact_store import artifact_store
+from functools import partial
+from io import BytesIO
+from metrics_panel import render_metrics_panel
+from background_jobs import background_jobs
+from job_panel import active_job, finished_job, render_job_progress, session_owner, show_job_outcome
+import telemetry
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="AI-Fit Score Mapper", layout="wide", initial_sidebar_state="collapsed")
-load_dotenv()
 
-# Configure Gemini API
+# Configure Gemini API. The client is created once per process and reused by every rerun.
 try:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-except (AttributeError, TypeError):
+    model = get_model(MODEL_NAME)
+except RuntimeError:
     st.error("🚨 Google API Key not found. Please ensure it's set in your .env file.")
     st.stop()
 
-# --- MODEL AND PROMPTS ---
-model = genai.GenerativeModel("gemini-2.5-flash-lite")
-
-prompt_template = """
-You are an expert ATS and career strategist. Your task is to perform a complete competency mapping of a resume against a job description.
-The output must be structured in two parts separated by '---'.
-
-Part 1: A valid CSV for the Competency Matrix with the following columns:
-Skill/Keyword,Present in Resume (✅/❌),Competency Rating (1-10),Suggestion to Improve
-
-Part 2: A Markdown-formatted report containing:
-- **Overall Resume Match Score:** A percentage (out of 100).
-- **Top 5 Matched Skills:** A bulleted list.
-- **Top 5 Missing Skills:** A bulleted list.
-- **Industry Benchmark Score:** A percentage (e.g., 75% for a senior role in tech).
-- **Personalized AI Tip of the Day:** A single, actionable tip.
-- **Final Review:** A summary paragraph.
-
-**Input:**
-
-**Job Description:**
-{jd_text}
-
-**Resume:**
-{resume_text}
-
-**Output:**
-"""
-
 # --- CORE FUNCTIONS ---
-def get_gemini_response(prompt):
+def get_competency_analysis(jd_text, resume_text, use_cache=True, reuse_similar_jd=True, by_section=False):
     try:
-        response = model.generate_content(prompt, request_options={"timeout": 180})
-        return response.text
+        if by_section:
+            return analyze_by_section(model, jd_text, resume_text, use_cache=use_cache,
+                                      reuse_similar_jd=use_cache and reuse_similar_jd)
+        return analyze_competency(model, jd_text, resume_text, use_cache=use_cache,
+                                  reuse_similar_jd=use_cache and reuse_similar_jd)
+    except ValueError as e:
+        raise ValueError(f"Failed to get a valid analysis from the AI model. Please try again. ({e})") from e
     except Exception as e:
-        st.error(f"🚨 API Error: {e}")
-        return None
+        raise RuntimeError(f"API Error: {e}") from e
+
+def run_dashboard_analysis(job, job_description, resume_pdf, use_cache=True, reuse_similar_jd=True, by_section=False):
+    """
+    Background job behind the Analyze button. It reports through `job` instead of calling
+    Streamlit and returns the dashboard's artifact references.
+    """
+    job.progress("Reading your resume...")
+    document = extract_document(resume_pdf)
+    notice = format_extraction_notice(document)
+    resume_text = document_text(document)
+    if not resume_text:
+        raise ValueError("Could not extract text from resume.")
+    job.check_cancelled()
+
+    jd_text, resume_text, token_stats = prepare_inputs(job_description, resume_text)
+    job.progress("Mapping your competencies...")
+    analysis = get_competency_analysis(jd_text, resume_text, use_cache=use_cache,
+                                       reuse_similar_jd=reuse_similar_jd, by_section=by_section)
+    job.check_cancelled()
+
+    job.progress("Drawing the charts...", analysis["report_text"])
+    df = analysis["dataframe"]
+    radar_chart, bar_chart = create_radar_chart(df), create_bar_chart(df)
+    return {
+        "notices": [notice] if notice else [],
+        "competency_ref": artifact_store.put_frame(df),
+        "report_ref": artifact_store.put_text(analysis["report_text"]),
+        "radar_ref": artifact_store.put(radar_chart.getvalue()) if radar_chart else None,
+        "bar_ref": artifact_store.put(bar_chart.getvalue()) if bar_chart else None,
+        "token_stats": token_stats,
+        "jd_reuse": analysis["reused"],
+        "section_stats": analysis.get("resume_sections"),
+    }
 
 def extract_text_from_pdf(uploaded_file):
     if uploaded_file:
         try:
-            pdf_reader = PdfReader(uploaded_file)
-            return "".join(page.extract_text() or "" for page in pdf_reader.pages)
+            document = extract_document(uploaded_file)
+            notice = format_extraction_notice(document)
+            if notice:
+                st.warning(notice)
+            return document_text(document)
         except Exception as e:
             st.error(f"Error reading PDF file: {e}")
     return None
@@ -84,10 +102,27 @@ def main():
     # --- Initialize Session State ---
     if 'analysis_complete' not in st.session_state:
         st.session_state.analysis_complete = False
-        st.session_state.competency_df = pd.DataFrame()
-        st.session_state.report_text = ""
-        st.session_state.radar_chart = None
-        st.session_state.bar_chart = None
+        # Results live in the shared artifact store; the session only keeps their references.
+        st.session_state.competency_ref = None
+        st.session_state.report_ref = None
+        st.session_state.radar_ref = None
+        st.session_state.bar_ref = None
+        st.session_state.token_stats = None
+        st.session_state.jd_reuse = None
+        st.session_state.section_stats = None
+
+    # Analyses run on a background executor under this tab's key, so a reload picks them up again.
+    # A finished one is taken before the inputs are drawn, so they collapse once results arrive.
+    owner = session_owner()
+    job = finished_job(owner)
+    if job is not None:
+        if job.status == "done":
+            for notice in job.result["notices"]:
+                st.warning(notice)
+            st.session_state.update({key: value for key, value in job.result.items() if key != "notices"})
+            st.session_state.analysis_complete = True
+        else:
+            show_job_outcome(job)
 
     # --- Input Section ---
     with st.expander("Step 1: Provide Inputs", expanded=not st.session_state.analysis_complete):
@@ -112,61 +147,78 @@ def main():
                 if linkedin_url:
                     job_description = get_jd_from_linkedin(linkedin_url)
 
+        bypass_cache = st.checkbox("Bypass cache (force a fresh analysis)", value=False)
+        reuse_similar_jd = st.checkbox("Reuse results for near-identical job descriptions", value=True,
+                                       help="Serves an earlier analysis of this resume when the job description is a repost or a lightly edited copy.")
+        by_section = st.checkbox("Analyze section by section (re-uploads only re-analyze edited sections)", value=False,
+                                 help="Summary, experience, skills, education and projects are analyzed separately and "
+                                      "cached, so after editing one bullet only that section reaches the model again. "
+                                      "The first analysis costs one model call per section instead of one in total.")
+        cache_stats = response_cache.stats()
+        st.caption(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, {cache_stats['entries']} stored answers")
+        st.caption(f"Output validation: {structured_output_stats['parse_failures']} invalid answers, "
+                   f"{structured_output_stats['repair_calls']} repair calls ({structured_output_stats['unrepaired']} unrepaired)")
+        st.caption(scheduler.format_stats())
+        st.caption(background_jobs.format_load())
+
     if st.button("🚀 Analyze & Generate Dashboard", use_container_width=True, type="primary"):
         if job_description and resume_file:
-            with st.spinner("AI is analyzing... Please wait a moment."):
-                resume_text = extract_text_from_pdf(resume_file)
-                if not resume_text:
-                    st.error("Could not extract text from resume.")
-                    st.stop()
-
-                prompt = prompt_template.format(jd_text=job_description, resume_text=resume_text)
-                analysis_result = get_gemini_response(prompt)
-
-                if analysis_result and '---' in analysis_result:
-                    csv_data, report_text = analysis_result.split('---', 1)
-                    df = pd.read_csv(StringIO(csv_data))
-                    
-                    st.session_state.competency_df = df
-                    st.session_state.report_text = report_text.strip()
-                    st.session_state.radar_chart = create_radar_chart(df)
-                    st.session_state.bar_chart = create_bar_chart(df)
-                    st.session_state.analysis_complete = True
-                    st.rerun()
-                else:
-                    st.error("Failed to get a valid analysis from the AI model. Please try again.")
+            background_jobs.submit(owner, "Competency Mapping", run_dashboard_analysis, job_description,
+                                   resume_file.getvalue(), use_cache=not bypass_cache,
+                                   reuse_similar_jd=reuse_similar_jd, by_section=by_section)
         else:
             st.warning("Please provide both a resume and a job description.")
 
+    job = active_job(owner)
+    if job is not None:
+        render_job_progress(job.id)
+
     # --- Results Dashboard ---
     if st.session_state.analysis_complete:
+        competency_df = artifact_store.get_frame(st.session_state.competency_ref)
+        report_text = artifact_store.get_text(st.session_state.report_ref)
+        radar_png = artifact_store.get(st.session_state.radar_ref)
+        bar_png = artifact_store.get(st.session_state.bar_ref)
+        if competency_df is None or report_text is None:
+            st.session_state.analysis_complete = False
+            st.warning("These results were cleared from the server to free memory. Please run the analysis again; "
+                       "cached answers make it quick.")
+            st.stop()
         st.header("📊 Your Results Dashboard")
         
         tab1, tab2, tab3, tab4 = st.tabs(["📈 AI-Fit Score & Review", "🎯 Competency Radar", "📊 Competency Bars", "📋 Full Report"])
 
         with tab1:
             st.subheader("AI-Fit Score & Review")
-            st.markdown(st.session_state.report_text)
+            if st.session_state.get("jd_reuse"):
+                st.info(format_reuse_notice(st.session_state.jd_reuse))
+            if st.session_state.get("section_stats"):
+                st.caption(format_section_stats(st.session_state.section_stats))
+            st.markdown(report_text)
+            if st.session_state.get("token_stats"):
+                st.caption(format_token_stats(st.session_state.token_stats))
 
         with tab2:
             st.subheader("Competency Radar Chart")
-            if st.session_state.radar_chart:
-                st.image(st.session_state.radar_chart, use_column_width=True)
+            if radar_png:
+                st.image(radar_png, use_column_width=True)
 
         with tab3:
             st.subheader("Competency Bar Chart")
-            if st.session_state.bar_chart:
-                st.image(st.session_state.bar_chart, use_column_width=True)
+            if bar_png:
+                st.image(bar_png, use_column_width=True)
 
         with tab4:
             st.subheader("Full Report Details")
             st.markdown("#### Competency Matrix")
-            st.dataframe(st.session_state.competency_df, use_container_width=True)
+            st.dataframe(competency_df, use_container_width=True)
             st.markdown("#### Analysis & Review")
-            st.markdown(st.session_state.report_text)
+            st.markdown(report_text)
             
             # --- Download Button ---
-            pdf_report = create_pdf_report(st.session_state.report_text, st.session_state.competency_df, st.session_state.radar_chart, st.session_state.bar_chart)
+            # The PDF is only built (and then memoized) when the download is clicked, not on every rerun.
+            pdf_report = partial(create_pdf_report, report_text, competency_df,
+                                 BytesIO(radar_png) if radar_png else None, BytesIO(bar_png) if bar_png else None)
             st.download_button(
                 label="📥 Download Full Report as PDF",
                 data=pdf_report,
@@ -175,5 +227,8 @@ def main():
                 use_container_width=True
             )
 
+    if telemetry.ADMIN_ENABLED:
+        render_metrics_panel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
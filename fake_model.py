@@ -0,0 +1,126 @@
+import hashlib
+import json
+import random
+import re
+import time
+
+# Words that look like skills in the canned answers; anything else in the prompt is ignored.
+SKILL_WORDS = [
+    "Python", "SQL", "Java", "JavaScript", "TypeScript", "React", "Docker", "Kubernetes", "AWS", "Azure",
+    "GCP", "Terraform", "Linux", "Git", "Spark", "Airflow", "Pandas", "TensorFlow", "PyTorch", "Django",
+    "Flask", "FastAPI", "PostgreSQL", "MongoDB", "Redis", "Kafka", "Tableau", "Excel", "Agile", "Scrum",
+]
+
+class FakeUsage:
+    def __init__(self, prompt: str, text: str):
+        # Roughly four characters per token, like the estimate in text_preprocess.
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class FakeResponse:
+    """Mimics the parts of a Gemini response the tools read: `text` and `usage_metadata`."""
+
+    def __init__(self, text: str, usage: FakeUsage | None = None):
+        self.text = text
+        self.usage_metadata = usage
+
+class FakeQuotaError(RuntimeError):
+    """Looks like the API's 429 ResourceExhausted error to code that checks `code`."""
+    code = 429
+
+class FakeModel:
+    """
+    Offline stand-in for `genai.GenerativeModel` that returns canned answers.
+
+    Competency prompts get a schema-valid JSON answer built from the skills named in the
+    prompt, and any other prompt gets a short markdown report. Answers are deterministic
+    for a given prompt. Each call sleeps for `latency` seconds (plus up to `jitter`), and
+    streamed answers deliver their first chunk after `first_token_latency` seconds. A
+    `fail_rate` fraction of calls, chosen at random, raises a quota error instead.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, first_token_latency: float | None = None,
+                 model_name: str = "fake-gemini", fail_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.first_token_latency = latency / 4 if first_token_latency is None else first_token_latency
+        self.model_name = model_name
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._failures = random.Random()
+
+    def _rng(self, prompt: str) -> random.Random:
+        return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+    def _delay(self, rng: random.Random) -> float:
+        return self.latency + (rng.random() * self.jitter if self.jitter else 0.0)
+
+    def _skills(self, text: str, rng: random.Random) -> list[str]:
+        found = [skill for skill in SKILL_WORDS if re.search(rf"\b{re.escape(skill)}\b", text, re.IGNORECASE)]
+        return found[:12] or rng.sample(SKILL_WORDS, 6)
+
+    def _competency(self, text: str) -> dict:
+        rng = self._rng(text)
+        skills = self._skills(text, rng)
+        present = {skill: rng.random() < 0.6 for skill in skills}
+        matched = [skill for skill in skills if present[skill]]
+        missing = [skill for skill in skills if not present[skill]]
+        return {
+            "competency_matrix": [
+                {"skill": skill, "present": present[skill], "rating": rng.randint(6, 10) if present[skill] else rng.randint(1, 4),
+                 "suggestion": f"Add a project that shows {skill} in production."}
+                for skill in skills
+            ],
+            "report": {
+                "overall_match_score": round(100 * len(matched) / len(skills)),
+                "top_matched_skills": matched[:5],
+                "top_missing_skills": missing[:5],
+                "industry_benchmark_score": 75,
+                "ai_tip": "Quantify the impact of your most relevant project.",
+                "final_review": "A canned review produced by the offline fake model.",
+            },
+        }
+
+    def answer(self, prompt: str) -> str:
+        rng = self._rng(prompt)
+        if '"candidates"' in prompt:
+            # Packed prompt: one entry per "=== CANDIDATE <id> ===" block, judged on the job description and that block.
+            jd_text = prompt.split("**Job Description:**", 1)[-1].split("**Resumes:**", 1)[0]
+            blocks = re.findall(r"=== CANDIDATE (\S+) ===\n(.*?)(?=\n=== CANDIDATE |\n\*\*Output:\*\*|\Z)", prompt, re.DOTALL)
+            return json.dumps({"candidates": [{"candidate": candidate, **self._competency(jd_text + block)}
+                                              for candidate, block in blocks]})
+        if '"competency_matrix"' in prompt or '"report"' in prompt:
+            return json.dumps(self._competency(prompt))
+        skills = self._skills(prompt, rng)
+        return (
+            f"- **Overall Match Score:** {rng.randint(40, 95)}%\n"
+            f"- **✅ Skills Matched:** {', '.join(skills[: len(skills) // 2]) or 'None'}\n"
+            f"- **❌ Skills Missing:** {', '.join(skills[len(skills) // 2:]) or 'None'}\n"
+            "- **📈 Recommended Additions:** Mention the missing skills where you have used them."
+        )
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, stream: bool = False):
+        prompt = prompt if isinstance(prompt, str) else "\n".join(map(str, prompt))
+        self.calls += 1
+        if self.fail_rate and self._failures.random() < self.fail_rate:
+            raise FakeQuotaError("429 Resource has been exhausted (simulated by the fake model)")
+        rng = self._rng(prompt)
+        text = self.answer(prompt)
+        delay = self._delay(rng)
+        if stream:
+            return self._stream(prompt, text, delay)
+        time.sleep(delay)
+        return FakeResponse(text, FakeUsage(prompt, text))
+
+    def _stream(self, prompt: str, text: str, delay: float):
+        words = re.findall(r"\S+\s*", text)
+        chunks = ["".join(words[i:i + 8]) for i in range(0, len(words), 8)] or [text]
+        time.sleep(min(self.first_token_latency, delay))
+        per_chunk = max(0.0, delay - self.first_token_latency) / len(chunks)
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(per_chunk)
+            # Like the real API, the final chunk carries the usage totals for the whole answer.
+            last = index == len(chunks) - 1
+            yield FakeResponse(chunk, FakeUsage(prompt, text) if last else None)
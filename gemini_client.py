@@ -0,0 +1,171 @@
+import itertools
+import json
+import os
+import time
+from functools import lru_cache
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR, make_key
+from model_scheduler import INTERACTIVE, scheduler
+from text_preprocess import estimate_tokens
+import telemetry
+
+MODEL_NAME = "gemini-2.5-flash-lite"
+
+# Set RESUME_TOOLS_DISABLE_CACHE=1 to bypass the response cache for every call.
+CACHE_DISABLED = os.getenv("RESUME_TOOLS_DISABLE_CACHE", "").lower() in ("1", "true", "yes")
+# Set RESUME_TOOLS_FAKE_MODEL=1 to answer every call offline with canned responses (see fake_model.py),
+# each taking RESUME_TOOLS_FAKE_LATENCY seconds.
+FAKE_MODEL = os.getenv("RESUME_TOOLS_FAKE_MODEL", "").lower() in ("1", "true", "yes")
+# Answer tokens assumed per call when reserving the tokens-per-minute budget; corrected from usage metadata.
+EXPECTED_ANSWER_TOKENS = 1024
+
+response_cache = DiskCache(
+    os.path.join(DEFAULT_CACHE_DIR, "gemini_responses.sqlite3"),
+    max_bytes=int(os.getenv("RESUME_TOOLS_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+    ttl_seconds=float(os.getenv("RESUME_TOOLS_CACHE_TTL", 7 * 24 * 3600)),
+)
+
+@lru_cache(maxsize=None)
+def get_model(model_name: str = MODEL_NAME):
+    """
+    Configures the SDK from the environment and returns the process-wide model client.
+
+    The SDK is imported here rather than at module level, so scripts that never call the
+    model (or Streamlit reruns after the first) do not pay for the import.
+    """
+    if FAKE_MODEL:
+        from fake_model import FakeModel
+        return FakeModel(latency=float(os.getenv("RESUME_TOOLS_FAKE_LATENCY", 0.5)), model_name=f"fake-{model_name}")
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise RuntimeError("GOOGLE_API_KEY not found. Please ensure it's set in your .env file.")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+def _cache_key(model, template_version: str, prompt: str) -> str:
+    return make_key(getattr(model, "model_name", MODEL_NAME), template_version, prompt)
+
+def generate_text(model, prompt: str, template_version: str, timeout: int = 120, use_cache: bool = True, validate=None,
+                  generation_config: dict | None = None, priority: int = INTERACTIVE) -> str:
+    """
+    Returns the model's answer to `prompt`, serving repeated prompts from the on-disk cache.
+
+    The cache key covers the model name, the prompt template version and the filled prompt,
+    so bumping a template version invalidates every answer produced by the old wording.
+    Answers rejected by the optional `validate` callable are returned but never cached.
+    API calls go through the process-wide scheduler: they are rate limited by `priority`,
+    identical calls already in flight are shared, and quota errors are retried. Other
+    exceptions from the API are propagated to the caller.
+    """
+    use_cache = use_cache and not CACHE_DISABLED
+    key = _cache_key(model, template_version, prompt)
+    if use_cache:
+        cached = response_cache.get_text(key)
+        if cached is not None:
+            return cached
+
+    kwargs = {"generation_config": generation_config} if generation_config else {}
+    model_name = getattr(model, "model_name", MODEL_NAME)
+
+    def call():
+        with telemetry.span("model_call", model=model_name, template=template_version) as attributes:
+            response = model.generate_content(prompt, request_options={"timeout": timeout}, **kwargs)
+            attributes.update(telemetry.record_usage(response, model_name) or {})
+        return response
+
+    flight_key = make_key(key, json.dumps(generation_config or {}, sort_keys=True))
+    response = scheduler.call(call, key=flight_key, priority=priority,
+                              tokens=estimate_tokens(prompt) + EXPECTED_ANSWER_TOKENS)
+    text = response.text
+    if text and (validate is None or validate(text)):
+        response_cache.set_text(key, text)
+    return text
+
+def cache_answer(model, prompt: str, template_version: str, text: str) -> None:
+    """Stores an answer for `prompt`, e.g. one assembled from several calls, so it is served next time."""
+    response_cache.set_text(_cache_key(model, template_version, prompt), text)
+
+def cached_answer(model, prompt: str, template_version: str) -> str | None:
+    """The stored answer for `prompt`, if any, without calling the model."""
+    if CACHE_DISABLED:
+        return None
+    return response_cache.get_text(_cache_key(model, template_version, prompt))
+
+class TextStream:
+    """
+    Iterates over the model's answer chunk by chunk while recording perceived latency.
+
+    After iteration, `text` holds the full answer, `time_to_first_token` and `total_time`
+    are in seconds, and `from_cache` tells whether the answer was replayed from the cache.
+    """
+
+    def __init__(self, model, prompt: str, template_version: str, timeout: int = 120, use_cache: bool = True,
+                 priority: int = INTERACTIVE):
+        self.model = model
+        self.prompt = prompt
+        self.template_version = template_version
+        self.timeout = timeout
+        self.use_cache = use_cache and not CACHE_DISABLED
+        self.priority = priority
+        self.text = ""
+        self.time_to_first_token = None
+        self.total_time = None
+        self.from_cache = False
+        self._chunks = None
+
+    def __iter__(self):
+        started = time.perf_counter()
+        key = _cache_key(self.model, self.template_version, self.prompt)
+        cached = response_cache.get_text(key) if self.use_cache else None
+        if cached is not None:
+            self.from_cache = True
+            chunks = [cached]
+        else:
+            # The call holds its scheduler slot until the answer is read to the end or the stream is closed.
+            chunks = self._chunks = scheduler.stream(self._open_stream, priority=self.priority,
+                                                     tokens=estimate_tokens(self.prompt) + EXPECTED_ANSWER_TOKENS)
+
+        parts = []
+        usage_chunk = None
+        for chunk in chunks:
+            if getattr(chunk, "usage_metadata", None) is not None:
+                usage_chunk = chunk
+            piece = chunk if isinstance(chunk, str) else _chunk_text(chunk)
+            if not piece:
+                continue
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - started
+            parts.append(piece)
+            yield piece
+        self.text = "".join(parts)
+        self.total_time = time.perf_counter() - started
+        if not self.from_cache:
+            model_name = getattr(self.model, "model_name", MODEL_NAME)
+            # The last chunk that carries usage metadata holds the totals for the whole answer.
+            usage = telemetry.record_usage(usage_chunk, model_name) if usage_chunk is not None else None
+            telemetry.record("model_call", self.total_time, model=model_name, template=self.template_version,
+                             stream=True, **(usage or {}))
+            if self.time_to_first_token is not None:
+                telemetry.record("model_first_token", self.time_to_first_token, model=model_name)
+        if self.text and not self.from_cache:
+            response_cache.set_text(key, self.text)
+
+    def close(self) -> None:
+        """Stops reading the answer early, e.g. after a cancel, and gives the call's scheduler slot back."""
+        if self._chunks is not None:
+            self._chunks.close()
+
+    def _open_stream(self):
+        """Starts the streamed call and waits for its first chunk, so quota errors surface inside the scheduler."""
+        chunks = iter(self.model.generate_content(self.prompt, stream=True, request_options={"timeout": self.timeout}))
+        first = next(chunks, None)
+        return chunks if first is None else itertools.chain([first], chunks)
+
+def _chunk_text(chunk) -> str:
+    # Chunks without candidates (e.g. trailing safety metadata) raise on `.text`.
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
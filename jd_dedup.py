@@ -0,0 +1,213 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from disk_cache import DEFAULT_CACHE_DIR
+from lazy_imports import lazy_module
+from text_preprocess import normalize_text
+
+np = lazy_module("numpy")
+
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "jd_index.sqlite3")
+# Job descriptions at least this similar (estimated Jaccard similarity of word 3-shingles) share results.
+SIMILARITY_THRESHOLD = float(os.getenv("RESUME_TOOLS_JD_SIMILARITY", 0.9))
+# Stored results older than this are not reused, and are deleted by a later eviction.
+RESULT_TTL_SECONDS = float(os.getenv("RESUME_TOOLS_CACHE_TTL", 7 * 24 * 3600))
+# Bytes of stored result text kept; beyond that the oldest results are deleted.
+MAX_RESULT_BYTES = int(os.getenv("RESUME_TOOLS_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+# Eviction scans every stored result, so a process runs it at most this often, on a write.
+EVICT_INTERVAL_SECONDS = 60
+
+SHINGLE_WORDS = 3
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs with similarity 0.8 become candidates ~95% of the time, 0.9 almost always.
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+# A fixed seed keeps signatures comparable across processes and runs.
+_rng = random.Random(20240601)
+_PERM_A = [_rng.randrange(1, 1 << 31) for _ in range(NUM_PERMUTATIONS)]
+_PERM_B = [_rng.randrange(0, 1 << 31) for _ in range(NUM_PERMUTATIONS)]
+
+def normalize_jd(text: str) -> str:
+    """Lower-cased words of the job description without posting boilerplate, whatever its source."""
+    return " ".join(re.findall(r"\w+", normalize_text(text, strip_boilerplate=True).lower()))
+
+def _shingle_hashes(normalized: str):
+    words = normalized.split()
+    if len(words) < SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.array([int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                     for s in shingles], dtype=np.uint64)
+
+def minhash(normalized: str):
+    """The MinHash signature (NUM_PERMUTATIONS uint32 values) of the text's word shingles."""
+    hashes = _shingle_hashes(normalized)
+    a = np.array(_PERM_A, dtype=np.uint64)
+    b = np.array(_PERM_B, dtype=np.uint64)
+    # a, b < 2^31 and hashes < 2^32, so a * x + b stays below 2^64.
+    permuted = (np.outer(hashes, a) + b) % np.uint64(_MERSENNE_PRIME)
+    return (permuted.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+def _band_keys(signature) -> list[tuple[int, str]]:
+    return [(band, hashlib.blake2b(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(),
+                                   digest_size=8).hexdigest())
+            for band in range(BANDS)]
+
+def _fingerprint(jd_text: str):
+    """The ID and MinHash signature of a job description."""
+    normalized = normalize_jd(jd_text)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest(), minhash(normalized)
+
+def similarity(signature_a, signature_b) -> float:
+    """Estimated Jaccard similarity: the share of permutations whose minimum agrees."""
+    return float((signature_a == signature_b).mean())
+
+class JDIndex:
+    """
+    Remembers job descriptions by MinHash signature and the analyses run against them.
+
+    Signatures are split into LSH bands stored in an indexed table, so finding similar
+    job descriptions costs one lookup per band instead of a comparison with every stored
+    one. Results are stored per (job description, resume, analysis) and served for any
+    later job description that is similar enough to the one they were computed for.
+
+    Like `DiskCache`, writes delete results older than `ttl_seconds` and then the oldest
+    results beyond `max_bytes` of text, along with the fingerprints no remaining result
+    refers to. The scan runs on at most one write per `evict_interval` seconds, so the
+    store can briefly overshoot `max_bytes`; expired results are never served meanwhile.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, max_bytes: int = MAX_RESULT_BYTES,
+                 ttl_seconds: float = RESULT_TTL_SECONDS, evict_interval: float = EVICT_INTERVAL_SECONDS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evict_interval = evict_interval
+        self._next_evict = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jds (jd_id TEXT PRIMARY KEY, signature BLOB NOT NULL, added REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS bands ("
+            " band INTEGER NOT NULL, bucket TEXT NOT NULL, jd_id TEXT NOT NULL, PRIMARY KEY (band, bucket, jd_id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS results ("
+            " jd_id TEXT NOT NULL, resume_key TEXT NOT NULL, analysis TEXT NOT NULL, result TEXT NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (jd_id, resume_key, analysis)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS results_created ON results (created);"
+            "CREATE INDEX IF NOT EXISTS bands_jd ON bands (jd_id);"
+        )
+        self._conn.commit()
+
+    def add(self, jd_text: str) -> str:
+        """Stores the job description's fingerprint (once) and returns its ID."""
+        jd_id, signature = _fingerprint(jd_text)
+        with self._lock, self._conn:
+            self._insert_fingerprint(jd_id, signature)
+        return jd_id
+
+    def _insert_fingerprint(self, jd_id: str, signature) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO jds (jd_id, signature, added) VALUES (?, ?, ?)",
+                           (jd_id, signature.tobytes(), time.time()))
+        self._conn.executemany("INSERT OR IGNORE INTO bands (band, bucket, jd_id) VALUES (?, ?, ?)",
+                               ((band, bucket, jd_id) for band, bucket in _band_keys(signature)))
+
+    def find_similar(self, jd_text: str, threshold: float = SIMILARITY_THRESHOLD) -> list[tuple[str, float]]:
+        """Returns (jd_id, similarity) of stored job descriptions at least `threshold` similar, most similar first."""
+        jd_id, signature = _fingerprint(jd_text)
+        keys = _band_keys(signature)
+        clause = " OR ".join("(b.band = ? AND b.bucket = ?)" for _ in keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT j.jd_id, j.signature FROM bands b JOIN jds j ON j.jd_id = b.jd_id WHERE {clause}",
+                [value for key in keys for value in key],
+            ).fetchall()
+        matches = []
+        for candidate_id, blob in rows:
+            score = 1.0 if candidate_id == jd_id else similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((candidate_id, score))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def store_result(self, jd_text: str, resume_key: str, analysis: str, result: str) -> None:
+        jd_id, signature = _fingerprint(jd_text)
+        # One transaction, so another writer's eviction cannot drop the fingerprint before the
+        # result that refers to it is stored.
+        with self._lock, self._conn:
+            self._insert_fingerprint(jd_id, signature)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (jd_id, resume_key, analysis, result, created) VALUES (?, ?, ?, ?, ?)",
+                (jd_id, resume_key, analysis, result, time.time()),
+            )
+            if time.monotonic() >= self._next_evict:
+                self._next_evict = time.monotonic() + self.evict_interval
+                self._evict()
+
+    def _evict(self) -> None:
+        self._conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(CAST(result AS BLOB))), 0) FROM results").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT jd_id, resume_key, analysis, LENGTH(CAST(result AS BLOB)) FROM results ORDER BY created ASC"
+            ).fetchall()
+            for jd_id, resume_key, analysis, size in rows:
+                self._conn.execute("DELETE FROM results WHERE jd_id = ? AND resume_key = ? AND analysis = ?",
+                                   (jd_id, resume_key, analysis))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        # A fingerprint is only worth keeping while some result is stored under it.
+        self._conn.execute("DELETE FROM jds WHERE jd_id NOT IN (SELECT jd_id FROM results)")
+        self._conn.execute("DELETE FROM bands WHERE jd_id NOT IN (SELECT jd_id FROM jds)")
+
+    def find_result(self, jd_text: str, resume_key: str, analysis: str,
+                    threshold: float = SIMILARITY_THRESHOLD) -> dict | None:
+        """
+        Returns the freshest stored result for this resume and analysis under the most similar
+        stored job description, as {"result", "similarity", "jd_id", "created"}, or None.
+        """
+        matches = self.find_similar(jd_text, threshold)
+        if not matches:
+            return None
+        scores = dict(matches)
+        placeholders = ",".join("?" * len(scores))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT jd_id, result, created FROM results WHERE resume_key = ? AND analysis = ?"
+                f" AND created > ? AND jd_id IN ({placeholders})",
+                [resume_key, analysis, time.time() - self.ttl_seconds, *scores],
+            ).fetchall()
+        if not rows:
+            return None
+        jd_id, result, created = max(rows, key=lambda row: (scores[row[0]], row[2]))
+        return {"result": result, "similarity": scores[jd_id], "jd_id": jd_id, "created": created}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jds").fetchone()[0]
+
+def resume_key(resume_text: str) -> str:
+    """Identifies a resume by its whitespace-normalized text."""
+    return hashlib.sha256(" ".join(resume_text.split()).encode("utf-8")).hexdigest()
+
+def find_reusable(jd_text: str, resume_text: str, analysis: str) -> dict | None:
+    """The stored `analysis` of this resume against a near-identical job description, if any."""
+    return jd_index.find_result(jd_text, resume_key(resume_text), analysis)
+
+def remember_result(jd_text: str, resume_text: str, analysis: str, result: str) -> None:
+    jd_index.store_result(jd_text, resume_key(resume_text), analysis, result)
+
+def format_reuse_notice(reuse: dict) -> str:
+    age_hours = (time.time() - reuse["created"]) / 3600
+    return (f"♻️ Reused an earlier analysis of this resume against a near-identical job description "
+            f"({reuse['similarity']:.0%} similar, {age_hours:.0f}h old). Tick 'Bypass cache' for a fresh analysis.")
+
+jd_index = JDIndex()
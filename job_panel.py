@@ -0,0 +1,85 @@
+import os
+import uuid
+import streamlit as st
+from background_jobs import JOB_TTL_SECONDS, background_jobs
+
+# How often a page with a running analysis checks on it.
+POLL_SECONDS = float(os.getenv("RESUME_TOOLS_UI_POLL_SECONDS", 1))
+# Cookie holding this browser's token; each tab's owner key starts with it.
+OWNER_COOKIE = "resume_tools_owner"
+# Cookie a page sets as it unloads (reload or close), naming the owner it leaves behind.
+RELOADED_COOKIE = "resume_tools_reloaded"
+# How long that cookie lasts; the reloaded page reads it as it connects.
+RELOADED_COOKIE_SECONDS = 60
+
+def session_owner() -> str:
+    """
+    The key this tab's analyses are filed under: the browser token from a cookie plus an id
+    kept in this tab's session state, so tabs in one browser never cancel or take each
+    other's analyses.
+
+    A reload starts a new session and so a new tab id. As the old page unloads it leaves its
+    owner key in a short-lived cookie, and the new session adopts that owner's job. Only a
+    page that actually unloaded hands over its job, so a tab that is open in the background
+    keeps its own. The token is deliberately not in the page URL: a copied link must not
+    hand the analyses, and the resume data in them, to whoever opens it.
+    """
+    browser = st.context.cookies.get(OWNER_COOKIE) or st.session_state.get("job_browser")
+    if not browser:
+        browser = uuid.uuid4().hex
+        # Streamlit can only read cookies, so the browser is asked to set it. Cookies are sent
+        # with the next page load, which is the one that needs it.
+        st.html(f"<script>document.cookie = '{OWNER_COOKIE}={browser}; path=/; "
+                f"max-age={JOB_TTL_SECONDS}; SameSite=Strict';</script>", unsafe_allow_javascript=True)
+    st.session_state.job_browser = browser
+    if "job_owner" not in st.session_state:
+        st.session_state.job_owner = f"{browser}:{uuid.uuid4().hex}"
+        previous = st.context.cookies.get(RELOADED_COOKIE, "")
+        # The cookie is shared by the browser's tabs, so only an owner of this browser is adopted.
+        if previous.startswith(f"{browser}:"):
+            background_jobs.adopt(previous, st.session_state.job_owner)
+    owner = st.session_state.job_owner
+    # Re-sent on every run, since the element is replaced on rerun; the listener is added once per page.
+    st.html(f"<script>window.resumeToolsOwner = '{owner}';"
+            "if (!window.resumeToolsUnloadHook) { window.resumeToolsUnloadHook = true;"
+            " window.addEventListener('pagehide', () => { document.cookie ="
+            f" '{RELOADED_COOKIE}=' + window.resumeToolsOwner + '; path=/; max-age={RELOADED_COOKIE_SECONDS};"
+            " SameSite=Strict'; }); }</script>", unsafe_allow_javascript=True)
+    return owner
+
+def active_job(owner: str):
+    job = background_jobs.latest(owner)
+    return job if job is not None and job.active else None
+
+def finished_job(owner: str):
+    """The owner's latest job if it finished since this session last took its result, else None."""
+    job = background_jobs.latest(owner)
+    if job is None or job.active or st.session_state.get("taken_job") == job.id:
+        return None
+    st.session_state.taken_job = job.id
+    return job
+
+def show_job_outcome(job) -> None:
+    """Reports a job that ended without a result."""
+    if job.status == "error":
+        st.error(f"🚨 {job.error}")
+    elif job.status == "cancelled":
+        st.info("Analysis cancelled. Model answers that had already completed stay cached, so running it again is quick.")
+
+@st.fragment(run_every=POLL_SECONDS)
+def render_job_progress(job_id: str) -> None:
+    """Polls a running job: status, age, the partial result so far and a cancel button. Reruns the page once it ends."""
+    job = background_jobs.get(job_id)
+    if job is None or not job.active:
+        st.rerun()
+    position = background_jobs.queue_position(job)
+    if position:
+        st.info(f"⏳ {job.label}: number {position} in the queue, waiting for {job.age:.0f}s...")
+    else:
+        st.info(f"⏳ {job.label}: {job.message} ({job.age:.0f}s)")
+    if not job.cancel_requested and st.button("✖️ Cancel analysis", key=f"cancel_{job.id}"):
+        background_jobs.cancel(job)
+    if job.cancel_requested:
+        st.caption("Cancelling after the current step...")
+    if job.partial:
+        st.markdown(job.partial + "▌")
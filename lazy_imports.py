@@ -0,0 +1,108 @@
+import argparse
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+import telemetry
+
+# Milliseconds spent importing each lazily loaded module in this process, in load order.
+import_timings = {}
+_load_lock = threading.Lock()
+
+class LazyModule(types.ModuleType):
+    """
+    Stands in for a module and imports it on first attribute access.
+
+    Streamlit re-executes the app script on every rerun, but a module-level
+    `pd = lazy_module("pandas")` only pays for the import the first time pandas is used.
+    """
+
+    def __init__(self, name: str, on_load=None):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_on_load = on_load
+        self._lazy_module = None
+
+    def _load(self) -> types.ModuleType:
+        if self._lazy_module is None:
+            with _load_lock:
+                if self._lazy_module is None:
+                    started = time.perf_counter()
+                    if self._lazy_on_load:
+                        self._lazy_on_load()
+                    module = importlib.import_module(self._lazy_name)
+                    import_timings.setdefault(self._lazy_name, (time.perf_counter() - started) * 1000)
+                    self._lazy_module = module
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_module(name: str, on_load=None) -> types.ModuleType:
+    """Returns the module if it is already imported, otherwise a proxy that imports it when first used."""
+    if name in sys.modules and on_load is None:
+        return sys.modules[name]
+    return LazyModule(name, on_load)
+
+def format_import_timings() -> str | None:
+    """Summarizes what the lazily loaded modules cost to import, or None before the first one loads."""
+    timings = dict(import_timings)
+    if not timings:
+        return None
+    slowest = sorted(timings.items(), key=lambda item: -item[1])[:3]
+    return (f"📦 Lazy imports: {len(timings)} module{'s' if len(timings) != 1 else ''} loaded in {sum(timings.values()):.0f} ms; slowest "
+            + ", ".join(f"{name} ({ms:.0f} ms)" for name, ms in slowest))
+
+def _collect_import_timings():
+    return [({"module": name}, round(ms / 1000, 6)) for name, ms in sorted(import_timings.items())]
+
+def profile_imports(modules: list[str]) -> tuple[list[tuple[str, float, float]], float]:
+    """
+    Measures a cold import of `modules` in a fresh interpreter with `python -X importtime`.
+
+    Returns (package, self ms, cumulative ms) for every top-level package imported along the
+    way, slowest first, and the total import time in milliseconds. A package's cumulative
+    time includes the packages it pulled in, so rows overlap and do not add up to the total.
+    """
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    rows, total_ms = [], 0.0
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)", line)
+        if not match:
+            continue
+        self_ms, cumulative_ms = int(match.group(1)) / 1000, int(match.group(2)) / 1000
+        depth, name = len(match.group(3)) // 2, match.group(4)
+        if depth == 0:
+            total_ms += cumulative_ms
+        if "." not in name and not name.startswith("_"):
+            rows.append((name, self_ms, cumulative_ms))
+    return sorted(rows, key=lambda row: -row[2]), total_ms
+
+def format_import_report(rows: list[tuple[str, float, float]], total_ms: float, limit: int = 25) -> str:
+    lines = [f"{'package':<32}{'self ms':>10}{'cumulative ms':>16}"]
+    for name, self_ms, cumulative_ms in rows[:limit]:
+        lines.append(f"{name:<32}{self_ms:>10.1f}{cumulative_ms:>16.1f}")
+    lines.append(f"{'total':<32}{'':>10}{total_ms:>16.1f}")
+    return "\n".join(lines)
+
+telemetry.register_collector("resume_tools_lazy_import_seconds", "gauge",
+                             "Time this process spent importing each lazily loaded module.", _collect_import_timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-module import time for a cold start.")
+    parser.add_argument("modules", nargs="*", default=["streamlit", "resumeATS", "competency_mapper"],
+                        help="Modules to import (default: streamlit and both apps).")
+    parser.add_argument("--limit", type=int, default=25, help="Number of modules to list (default: 25).")
+    args = parser.parse_args(argv)
+    rows, total_ms = profile_imports(args.modules)
+    print(format_import_report(rows, total_ms, args.limit))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,124 @@
-import requests
-from bs4 import BeautifulSoup
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import streamlit as st
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR, make_key
+from lazy_imports import lazy_module
+import telemetry
+
+requests = lazy_module("requests")
+bs4 = lazy_module("bs4")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+REQUEST_TIMEOUT = 15
+# Pages fetched within this many seconds are served from disk without contacting the server.
+FRESH_SECONDS = float(os.getenv("RESUME_TOOLS_HTTP_FRESH_SECONDS", 3600))
+# Requests per second allowed against a single host by the bulk fetcher.
+PER_HOST_RATE = float(os.getenv("RESUME_TOOLS_HTTP_PER_HOST_RATE", 2.0))
+
+http_cache = DiskCache(os.path.join(DEFAULT_CACHE_DIR, "http_pages.sqlite3"), max_bytes=100 * 1024 * 1024, ttl_seconds=30 * 24 * 3600)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Returns the process-wide pooled session, so repeated fetches reuse TCP/TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+        return _session
+
+class HostRateLimiter:
+    """Spaces out requests to the same host to at most `rate` per second, across threads."""
+
+    def __init__(self, rate: float = PER_HOST_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def fetch_page(url: str, rate_limiter: HostRateLimiter | None = None) -> str:
+    """
+    Returns the body of `url`, using the on-disk HTTP cache.
+
+    Fresh entries (younger than FRESH_SECONDS) are served without a request; older ones are
+    revalidated with If-None-Match/If-Modified-Since and reused on a 304 response.
+    Raises requests.exceptions.RequestException on network or HTTP errors.
+    """
+    with telemetry.span("linkedin_fetch") as attributes:
+        body, attributes["source"] = _fetch_page(url, rate_limiter)
+    return body
+
+def _fetch_page(url: str, rate_limiter: HostRateLimiter | None) -> tuple[str, str]:
+    """Returns the body and where it came from: "cache", "revalidated" or "network"."""
+    key = make_key("GET", url)
+    cached = http_cache.get_text(key)
+    entry = json.loads(cached) if cached else None
+    if entry and time.time() - entry["fetched_at"] < FRESH_SECONDS:
+        return entry["body"], "cache"
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    if rate_limiter:
+        rate_limiter.wait(url)
+    response = get_session().get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+    if response.status_code == 304 and entry:
+        entry["fetched_at"] = time.time()
+        http_cache.set_text(key, json.dumps(entry))
+        return entry["body"], "revalidated"
+    response.raise_for_status()
+
+    body = response.text
+    http_cache.set_text(key, json.dumps({
+        "body": body,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": time.time(),
+    }))
+    return body, "network"
+
+def parse_job_description(html: str) -> str | None:
+    """Extracts the job description text from a LinkedIn job page, or None if it cannot be found."""
+    soup = bs4.BeautifulSoup(html, 'lxml')
+
+    # Primary target for the main job description content
+    job_description_div = soup.find('div', class_='description__text')
+    if job_description_div:
+        return job_description_div.get_text(separator='\n').strip()
+
+    # Fallback target if the primary class name isn't found
+    job_description_div = soup.find('section', class_='show-more-less-html')
+    if job_description_div:
+        return job_description_div.get_text(separator='\n').strip()
+
+    return None
+
+def is_linkedin_job_url(url: str) -> bool:
+    return bool(url) and "linkedin.com/jobs/view/" in url
 
 def get_jd_from_linkedin(url: str) -> str | None:
     """
@@ -12,36 +130,51 @@ def get_jd_from_linkedin(url: str) -> str | None:
     Returns:
         The job description text as a string, or None if an error occurs.
     """
-    if not url or "linkedin.com/jobs/view/" not in url:
+    if not is_linkedin_job_url(url):
         st.error("Invalid LinkedIn job URL provided.")
         return None
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
     try:
-        response = requests.get(url, timeout=15, headers=headers)
-        response.raise_for_status()
+        html = fetch_page(url)
     except requests.exceptions.RequestException as e:
         st.error(f"Failed to fetch URL: {e}")
         return None
 
-    soup = BeautifulSoup(response.content, 'lxml')
-
-    # Primary target for the main job description content
-    job_description_div = soup.find('div', class_='description__text')
-    if job_description_div:
-        return job_description_div.get_text(separator='\\n').strip()
-
-    # Fallback target if the primary class name isn't found
-    job_description_div = soup.find('section', class_='show-more-less-html')
-    if job_description_div:
-        return job_description_div.get_text(separator='\\n').strip()
+    job_description = parse_job_description(html)
+    if job_description:
+        return job_description
 
     st.warning("Could not automatically extract the job description. The page structure may have changed. Please paste it manually.")
     return None
 
+def fetch_many(urls: list[str], max_workers: int = 8, per_host_rate: float = PER_HOST_RATE) -> dict:
+    """
+    Fetches many pages concurrently through the shared session and HTTP cache.
+
+    Requests to the same host are rate limited to `per_host_rate` per second. Returns a dict
+    mapping each URL to its body, or to the exception raised while fetching it.
+    """
+    rate_limiter = HostRateLimiter(per_host_rate)
+
+    def fetch(url):
+        try:
+            return fetch_page(url, rate_limiter)
+        except requests.exceptions.RequestException as e:
+            return e
+
+    unique_urls = list(dict.fromkeys(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(unique_urls, pool.map(fetch, unique_urls)))
+
+def get_jds_from_linkedin(urls: list[str], max_workers: int = 8) -> dict:
+    """Bulk version of get_jd_from_linkedin: maps each URL to its job description, or None on failure."""
+    valid_urls = [url for url in urls if is_linkedin_job_url(url)]
+    pages = fetch_many(valid_urls, max_workers=max_workers)
+    return {
+        url: parse_job_description(pages[url]) if isinstance(pages.get(url), str) else None
+        for url in urls
+    }
+
 if __name__ == '__main__':
     # This block is for direct testing of the scraper.
     # To use, run `python linkedin_scraper.py` in your terminal.
@@ -53,4 +186,4 @@ if __name__ == '__main__':
         print(jd[:500] + "...") # Print first 500 chars
         print("--------------------------------------------")
     else:
-        print("\\n--- Failed to extract job description. ---")
\ No newline at end of file
+        print("\\n--- Failed to extract job description. ---")
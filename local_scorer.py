@@ -0,0 +1,119 @@
+from __future__ import annotations
+import re
+from lazy_imports import lazy_module
+
+np = lazy_module("numpy")
+sparse = lazy_module("scipy.sparse")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also an and any are as at be because been before being below between
+both but by can could did do does doing during each either etc few for from further had has have having he her here
+hers him his how i if in into is it its itself just least less like may me might more most must my no nor not of off
+on once only or other our ours out over own per same shall she should so some such than that the their theirs them
+then there these they this those through to too under until up upon us very via was we well were what when where
+which while who whom why will with within without would you your yours
+ability able candidate candidates company experience including job knowledge looking preferred required
+requirements responsibilities role skills strong team work working years year plus using use good excellent new
+need needs seeking join ideal opportunity
+""".split())
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def tokenize(text: str) -> list[str]:
+    """Lowercases and splits text into terms, keeping tokens like 'c++', 'c#' and 'node.js' intact."""
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+def _count_matrix(docs: list[list[str]], vocabulary: dict[str, int]) -> sparse.csr_matrix:
+    rows, cols = [], []
+    for i, tokens in enumerate(docs):
+        for token in tokens:
+            j = vocabulary.get(token)
+            if j is not None:
+                rows.append(i)
+                cols.append(j)
+    data = np.ones(len(rows), dtype=np.float64)
+    # Duplicate (row, col) pairs are summed, which turns occurrences into term frequencies.
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(docs), len(vocabulary)))
+
+def score_resumes(jd_text: str, resume_texts: list[str], top_keywords: int = 30) -> list[dict]:
+    """
+    Scores every resume against the job description in a single pass of sparse matrix operations.
+
+    Returns one dict per resume (in input order) with:
+      score   - share of the JD's keyword weight (how often the JD mentions each keyword) covered by the resume, 0-100
+      cosine  - TF-IDF cosine similarity between resume and JD, 0-1
+      bm25    - Okapi BM25 score of the resume for the JD used as a query
+      matched - JD keywords found in the resume, most important first
+      missing - JD keywords absent from the resume, most important first
+    """
+    jd_tokens = tokenize(jd_text)
+    resume_tokens = [tokenize(text) for text in resume_texts]
+    jd_terms = list(dict.fromkeys(jd_tokens))
+    if not jd_terms or not resume_texts:
+        return [{"score": 0.0, "cosine": 0.0, "bm25": 0.0, "matched": [], "missing": []} for _ in resume_texts]
+    # JD terms come first in the vocabulary so the query space is the column range [0, n_query).
+    n_query = len(jd_terms)
+    vocabulary = {term: j for j, term in enumerate(dict.fromkeys(jd_terms + [t for tokens in resume_tokens for t in tokens]))}
+    terms = np.array(list(vocabulary))
+
+    counts = _count_matrix(resume_tokens, vocabulary)
+    jd_counts = _count_matrix([jd_tokens], vocabulary).toarray().ravel()
+    n_docs = counts.shape[0]
+    doc_freq = np.bincount(counts.indices, minlength=len(vocabulary))
+    doc_len = np.array([len(tokens) for tokens in resume_tokens], dtype=np.float64)
+
+    # TF-IDF with smoothed IDF over the resumes plus the JD, then cosine similarity.
+    idf = np.log((n_docs + 2) / (doc_freq + 1)) + 1.0
+    tfidf = counts.multiply(idf).tocsr()
+    row_norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    jd_vector = jd_counts * idf
+    jd_norm = np.linalg.norm(jd_vector)
+    cosine = (tfidf @ jd_vector) / np.maximum(row_norms * jd_norm, 1e-12)
+
+    # Okapi BM25 with the JD's distinct terms as the query.
+    bm25_idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+    avg_len = doc_len.mean() if doc_len.mean() > 0 else 1.0
+    coo = counts[:, :n_query].tocoo()
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[coo.row] / avg_len)
+    bm25_weights = bm25_idf[coo.col] * coo.data * (BM25_K1 + 1) / (coo.data + length_norm)
+    bm25 = np.asarray(sparse.csr_matrix((bm25_weights, (coo.row, coo.col)), shape=coo.shape).sum(axis=1)).ravel()
+
+    # Keyword coverage over the JD's most important terms. They are weighted by how often the JD
+    # mentions them, not by IDF: IDF comes from the resumes being scored, so a keyword that a
+    # lone resume lacks would weigh more than one it has, and the score would depend on the batch.
+    keyword_idx = np.argsort(-jd_counts[:n_query], kind="stable")[:top_keywords]
+    keyword_weight = jd_counts[keyword_idx]
+    present = counts[:, keyword_idx].toarray() > 0
+    coverage = 100.0 * (present @ keyword_weight) / max(keyword_weight.sum(), 1e-12)
+
+    results = []
+    for i in range(n_docs):
+        results.append({
+            "score": round(float(coverage[i]), 1),
+            "cosine": round(float(cosine[i]), 4),
+            "bm25": round(float(bm25[i]), 4),
+            "matched": terms[keyword_idx[present[i]]].tolist(),
+            "missing": terms[keyword_idx[~present[i]]].tolist(),
+        })
+    return results
+
+def shortlist(jd_text: str, resume_texts: list[str], top_k: int) -> tuple[list[int], list[dict]]:
+    """Returns the indices of the `top_k` best locally scored resumes, best first, plus all scores."""
+    scores = score_resumes(jd_text, resume_texts)
+    order = sorted(range(len(scores)), key=lambda i: (-scores[i]["score"], -scores[i]["bm25"]))
+    return order[:top_k], scores
+
+def format_local_report(result: dict) -> str:
+    """Renders a local score as markdown in the same shape as the 'Similarity Score' analysis."""
+    matched = ", ".join(result["matched"]) or "None"
+    missing = ", ".join(result["missing"]) or "None"
+    return (
+        f"- **Overall Match Score (local keyword coverage):** {result['score']:.0f}%\n"
+        f"- **TF-IDF Similarity:** {result['cosine']:.2f}\n"
+        f"- **✅ Skills Matched:** {matched}\n"
+        f"- **❌ Skills Missing:** {missing}\n\n"
+        "_Computed locally from keyword statistics without calling the AI model._"
+    )
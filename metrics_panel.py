@@ -0,0 +1,51 @@
+import os
+import streamlit as st
+import telemetry
+from artifact_store import artifact_store
+from pdf_extract import sandbox
+from report_generator import format_chart_stats
+from lazy_imports import format_import_timings, lazy_module
+
+pd = lazy_module("pandas")
+
+def _read_log() -> bytes:
+    with open(telemetry.LOG_FILE, "rb") as f:
+        return f.read()
+
+def render_metrics_panel():
+    """Shows p50/p95/p99 per stage and analysis type, token counts and the metric exports."""
+    with st.expander("📈 Metrics (admin)"):
+        source = st.radio("Timings from:", ["This server process", "Telemetry log"], horizontal=True, key="metrics_source")
+        rows = telemetry.summarize() if source == "This server process" else telemetry.summarize(telemetry.load_log())
+        if rows:
+            table = pd.DataFrame(rows)
+            for column in ("mean", "p50", "p95", "p99"):
+                table[column] = (table[column] * 1000).round(1)
+            st.dataframe(table.rename(columns={"mean": "mean ms", "p50": "p50 ms", "p95": "p95 ms", "p99": "p99 ms"}),
+                         use_container_width=True, hide_index=True)
+        else:
+            st.info("No stages recorded yet.")
+
+        # Memory held for session results across every session of this server process.
+        st.caption(artifact_store.format_usage())
+        st.caption(sandbox.format_stats())
+        chart_stats = format_chart_stats()
+        if chart_stats:
+            st.caption(chart_stats)
+        import_stats = format_import_timings()
+        if import_stats:
+            st.caption(import_stats)
+
+        tokens = telemetry.token_totals()
+        if tokens:
+            st.dataframe(pd.DataFrame(tokens), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus metrics", data=telemetry.prometheus_text, file_name="resume_tools_metrics.prom",
+                               mime="text/plain", use_container_width=True)
+        if telemetry.LOG_FILE and os.path.exists(telemetry.LOG_FILE):
+            with col2:
+                # Read only when downloaded; the log can be several megabytes.
+                st.download_button("Telemetry log (JSON lines)", data=_read_log, file_name="telemetry.jsonl",
+                                   mime="application/jsonl", use_container_width=True)
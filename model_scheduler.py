@@ -0,0 +1,232 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+import telemetry
+
+# Priorities: lower runs first. Interactive app requests overtake queued batch work.
+INTERACTIVE = 0
+BATCH = 10
+
+# Quotas of the model API, shared by every session and thread of this process.
+REQUESTS_PER_MINUTE = float(os.getenv("RESUME_TOOLS_MODEL_RPM", 60))
+TOKENS_PER_MINUTE = float(os.getenv("RESUME_TOOLS_MODEL_TPM", 1_000_000))
+MAX_CONCURRENT_CALLS = int(os.getenv("RESUME_TOOLS_MODEL_CONCURRENCY", 8))
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+QUOTA_ERROR_NAMES = ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable")
+
+class QuotaExceededError(RuntimeError):
+    """Raised when the model keeps rejecting a call for quota reasons after every retry."""
+
+def is_quota_error(error: BaseException) -> bool:
+    """True for rate-limit and overload errors (HTTP 429/503), which are worth retrying after a pause."""
+    return type(error).__name__ in QUOTA_ERROR_NAMES or getattr(error, "code", None) in (429, 503)
+
+class TokenBucket:
+    """A bucket refilled continuously at `per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.available >= amount else (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Removes `amount` units; a negative balance is paid back by later refills."""
+        self._refill()
+        self.available -= amount
+
+class ModelScheduler:
+    """
+    Process-wide gate in front of the model API.
+
+    Calls are admitted in priority order while requests-per-minute and tokens-per-minute
+    budgets and a concurrency cap allow it. Identical calls that are already in flight
+    share one result instead of reaching the API again. Quota errors are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE, tokens_per_minute: float = TOKENS_PER_MINUTE,
+                 max_concurrent: int = MAX_CONCURRENT_CALLS, max_retries: int = MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE_SECONDS, backoff_max: float = BACKOFF_MAX_SECONDS):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "quota_errors": 0, "wait_seconds": 0.0, "max_queue": 0}
+
+    def _count(self, **increments) -> None:
+        with self._cond:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._waiting)
+
+    def _acquire(self, priority: int, tokens: int) -> None:
+        started = time.perf_counter()
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._waiting))
+            try:
+                while True:
+                    if self._waiting[0] == ticket and self._active < self.max_concurrent:
+                        wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                self.requests.take(1)
+                self.tokens.take(min(tokens, self.tokens.capacity))
+                self._active += 1
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+        waited = time.perf_counter() - started
+        self._count(wait_seconds=waited)
+        telemetry.record("scheduler_wait", waited, priority=priority)
+
+    def _release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _settle_tokens(self, estimated: int, response) -> None:
+        """Charges or refunds the difference between the estimated and the reported token usage."""
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", 0) or 0
+        if actual:
+            with self._cond:
+                self.tokens.take(actual - min(estimated, self.tokens.capacity))
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = INTERACTIVE, tokens: int = 0):
+        """Holds one admitted call for the duration of the block, e.g. while a streamed answer is read."""
+        self._acquire(priority, tokens)
+        self._count(calls=1)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, so retrying sessions do not hit the API in lockstep."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _after_failure(self, error: Exception, attempt: int) -> None:
+        """Re-raises anything but a quota error, gives up after the last retry, else backs off before the next attempt."""
+        if not is_quota_error(error):
+            raise error
+        self._count(quota_errors=1)
+        if attempt == self.max_retries:
+            raise QuotaExceededError(
+                f"The model API is over its rate limit and still refused the call after {self.max_retries} "
+                f"retries. Please try again in a minute. ({error})") from error
+        self._count(retries=1)
+        time.sleep(self.backoff(attempt))
+
+    def _call_with_retries(self, fn, priority: int, tokens: int):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.slot(priority, tokens):
+                    response = fn()
+                self._settle_tokens(tokens, response)
+                return response
+            except Exception as e:
+                self._after_failure(e, attempt)
+
+    def stream(self, open_stream, priority: int = INTERACTIVE, tokens: int = 0):
+        """
+        Runs a streamed call under the rate limits and yields its chunks.
+
+        `open_stream()` starts the call and returns an iterator over its chunks; quota errors
+        it raises are retried like in `call`. The call keeps its slot until the chunks are used
+        up or the generator is closed, and its token estimate is then settled from the last
+        chunk that carries usage metadata (the totals for the whole answer).
+        """
+        for attempt in range(self.max_retries + 1):
+            with self.slot(priority, tokens):
+                try:
+                    chunks = open_stream()
+                except Exception as e:
+                    error = e
+                else:
+                    usage_chunk = None
+                    try:
+                        for chunk in chunks:
+                            if getattr(chunk, "usage_metadata", None) is not None:
+                                usage_chunk = chunk
+                            yield chunk
+                    finally:
+                        self._settle_tokens(tokens, usage_chunk)
+                    return
+            self._after_failure(error, attempt)
+
+    def call(self, fn, key: str | None = None, priority: int = INTERACTIVE, tokens: int = 0):
+        """
+        Runs `fn()` (one model API call) under the rate limits and returns its result.
+
+        `tokens` is the estimated token cost, corrected from the response's usage metadata
+        afterwards. Callers passing the same `key` while a call is in flight wait for that
+        call and get its result (or exception) instead of making their own.
+        """
+        if key is None:
+            return self._call_with_retries(fn, priority, tokens)
+
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+        if not leader:
+            self._count(coalesced=1)
+            return flight.result()
+
+        try:
+            result = self._call_with_retries(fn, priority, tokens)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def format_stats(self) -> str:
+        return (f"🚦 Model calls: {self.stats['calls']} sent, {self.stats['coalesced']} shared with identical requests, "
+                f"{self.stats['retries']} retried after quota errors, {self.queue_depth()} queued")
+
+scheduler = ModelScheduler()
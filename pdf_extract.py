@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR
+from pdf_sandbox import OUTCOMES, SandboxPool
+import telemetry
+
+MEMORY_CACHE_ENTRIES = 128
+
+pdf_text_cache = DiskCache(os.path.join(DEFAULT_CACHE_DIR, "pdf_text.sqlite3"), max_bytes=50 * 1024 * 1024, ttl_seconds=None)
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+# Untrusted uploads are parsed in worker processes with time, memory and page limits (see pdf_sandbox.py).
+sandbox = SandboxPool()
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def read_bytes(source) -> bytes:
+    """Accepts raw bytes, a path, a Streamlit UploadedFile or any binary file-like object."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+# A timeout or a killed worker may not happen again on a less busy server, so only complete
+# (or deterministically cut) documents are kept, in memory as well as on disk.
+CACHED_STATUSES = ("ok", "page_limit")
+
+def _from_memory(key: str) -> dict | None:
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+    return None
+
+def _from_disk(key: str) -> dict | None:
+    cached = pdf_text_cache.get_text(key)
+    if cached is None:
+        return None
+    document = json.loads(cached)
+    if isinstance(document, list):
+        # Entries written before extraction was sandboxed hold just the pages.
+        document = {"pages": document, "page_count": len(document), "status": "ok", "error": None}
+    _remember(key, document, on_disk=False)
+    return document
+
+def _remember(key: str, document: dict, on_disk: bool = True) -> None:
+    if document["status"] not in CACHED_STATUSES:
+        return
+    if on_disk:
+        pdf_text_cache.set_text(key, json.dumps(document))
+    with _memory_lock:
+        _memory_cache[key] = document
+        while len(_memory_cache) > MEMORY_CACHE_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+def extract_document(source) -> dict:
+    """
+    Returns {"pages", "page_count", "status", "error"} for a PDF, served from the memory or disk cache when possible.
+
+    Each page is a dict with the page number, its text and the extraction time in seconds.
+    `status` is "ok" unless a limit was hit (see `SandboxPool.extract`), in which case the
+    pages extracted before it are returned.
+    """
+    data = read_bytes(source)
+    key = file_digest(data)
+    document = _from_memory(key)
+    if document is not None:
+        return document
+
+    with telemetry.span("pdf_extraction", pdf_bytes=len(data)) as attributes:
+        document = _from_disk(key)
+        cached = document is not None
+        if not cached:
+            document = sandbox.extract(data)
+            _remember(key, document)
+        attributes.update(pages=len(document["pages"]), cached=cached, status=document["status"])
+    return document
+
+def iter_pages(source, outcome: dict | None = None):
+    """
+    Yields one dict per page, in order, with the page number, its text and the extraction time in seconds.
+
+    Pages are yielded as the sandbox extracts them, and stopping the iteration early stops
+    the extraction (see `SandboxPool.iter_pages`). A document read to the end is cached like
+    `extract_document`. `outcome`, if given, receives its "page_count", "status" and "error".
+    """
+    data = read_bytes(source)
+    key = file_digest(data)
+    document = _from_memory(key) or _from_disk(key)
+    if document is not None:
+        if outcome is not None:
+            outcome.update(page_count=document["page_count"], status=document["status"], error=document["error"])
+        yield from document["pages"]
+        return
+
+    outcome = {} if outcome is None else outcome
+    pages = []
+    for page in sandbox.iter_pages(data, outcome):
+        pages.append(page)
+        yield page
+    _remember(key, {"pages": pages, **outcome})
+
+def extract_pages(source) -> list[dict]:
+    """Returns every extracted page with its text and timing."""
+    return extract_document(source)["pages"]
+
+def document_text(document: dict) -> str:
+    return "".join(page["text"] for page in document["pages"])
+
+def extract_text(source) -> str:
+    """Returns the text of the whole document, cached by the SHA-256 of the file bytes."""
+    return document_text(extract_document(source))
+
+def slowest_pages(source, limit: int = 5) -> list[dict]:
+    """Returns the pages that took longest to extract, to help track down pathological PDFs."""
+    pages = extract_pages(source)
+    return sorted(({"page": p["page"], "seconds": p["seconds"]} for p in pages), key=lambda p: -p["seconds"])[:limit]
+
+def format_extraction_notice(document: dict) -> str | None:
+    """A warning for a document that was only partly extracted, or None if it was read completely."""
+    status, pages = document["status"], len(document["pages"])
+    total = document["page_count"] or "?"
+    if status == "ok":
+        return None
+    if status == "page_limit":
+        return f"⚠️ Only the first {pages} of {total} pages were read; the rest of this PDF was skipped."
+    reason = {"timeout": "took too long to read", "memory": "needed too much memory",
+              "crashed": "crashed the PDF reader", "invalid": "is partly damaged"}[status]
+    return f"⚠️ This PDF {reason}; the analysis uses the {pages} of {total} pages read before that."
+
+def _collect_outcomes():
+    return [({"outcome": outcome}, sandbox.stats[outcome]) for outcome in OUTCOMES]
+
+telemetry.register_collector("resume_tools_pdf_documents_total", "counter",
+                             "PDF documents extracted, by outcome (timeouts and killed workers included).",
+                             _collect_outcomes)
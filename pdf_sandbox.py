@@ -0,0 +1,244 @@
+import multiprocessing
+import os
+import threading
+import time
+from io import BytesIO
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit, only the timeout applies.
+    resource = None
+
+# Limits for one document: wall-clock seconds, worker address space and pages extracted.
+TIMEOUT_SECONDS = float(os.getenv("RESUME_TOOLS_PDF_TIMEOUT", 20))
+MEMORY_BYTES = int(float(os.getenv("RESUME_TOOLS_PDF_MEMORY_MB", 768)) * 1024 * 1024)
+MAX_PAGES = int(os.getenv("RESUME_TOOLS_PDF_MAX_PAGES", 50))
+MAX_WORKERS = int(os.getenv("RESUME_TOOLS_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+# Documents with at least this many pages are split across idle workers.
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("RESUME_TOOLS_PDF_PARALLEL_PAGES", 16))
+
+# Outcomes of a document, from worst to best; a document reports the worst one that happened.
+OUTCOMES = ("timeout", "memory", "crashed", "invalid", "page_limit", "ok")
+
+def _serve(conn, memory_bytes: int) -> None:
+    """Worker loop: extracts the requested page range of each document sent over `conn`."""
+    if resource is not None and memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    import PyPDF2
+    while True:
+        try:
+            data, start, stop, max_pages = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reader = PyPDF2.PdfReader(BytesIO(data))
+            count = len(reader.pages)
+            conn.send(("count", count))
+            for index in range(start, min(count if stop is None else stop, count, max_pages)):
+                started = time.perf_counter()
+                text = reader.pages[index].extract_text() or ""
+                conn.send(("page", index, text, time.perf_counter() - started))
+            conn.send(("done",))
+        except MemoryError:
+            # The heap may be left in a bad state; report and let the supervisor start a fresh worker.
+            reader = None
+            try:
+                conn.send(("error", "memory", "the document needed more memory than allowed"))
+            finally:
+                os._exit(1)
+        except Exception as e:
+            conn.send(("error", "invalid", f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    def __init__(self, context, memory_bytes: int):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, memory_bytes), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+class SandboxPool:
+    """
+    Extracts PDF text in supervised worker processes, so a hostile or broken document cannot
+    stall or exhaust the calling process.
+
+    Every document gets a wall-clock deadline, and each worker runs under an address-space
+    limit. Only the first `max_pages` pages are extracted. A worker that overruns the
+    deadline, runs out of memory or dies is killed and replaced, and the pages it delivered
+    before that are kept. Workers are started on first use (with "spawn", so the memory
+    limit does not count the parent's memory) and reused for later documents.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, timeout: float = TIMEOUT_SECONDS,
+                 memory_bytes: int = MEMORY_BYTES, max_pages: int = MAX_PAGES,
+                 parallel_threshold: int = PARALLEL_PAGE_THRESHOLD):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_bytes = memory_bytes
+        self.max_pages = max_pages
+        self.parallel_threshold = parallel_threshold
+        self._context = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._idle = []
+        self._live = 0
+        self.stats = {"documents": 0, "workers_started": 0, **{outcome: 0 for outcome in OUTCOMES}}
+
+    def _acquire(self, block: bool = True) -> _Worker | None:
+        with self._cond:
+            while not self._idle and self._live >= self.max_workers:
+                if not block:
+                    return None
+                self._cond.wait()
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                # Died while idle (e.g. killed from outside); start a replacement below.
+                worker.conn.close()
+                self._live -= 1
+            self._live += 1
+            self.stats["workers_started"] += 1
+        try:
+            return _Worker(self._context, self.memory_bytes)
+        except BaseException:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy:
+            worker.kill()
+        with self._cond:
+            if healthy:
+                self._idle.append(worker)
+            else:
+                self._live -= 1
+            self._cond.notify()
+
+    def _split(self, start: int, stop: int) -> list[tuple[_Worker, tuple[int, int]]]:
+        """Hands [start, stop) out to whichever workers are idle right now, in contiguous ranges."""
+        workers = []
+        while len(workers) < stop - start:
+            worker = self._acquire(block=False)
+            if worker is None:
+                break
+            workers.append(worker)
+        bounds = [start + (stop - start) * i // len(workers) for i in range(len(workers) + 1)] if workers else []
+        return [(worker, (bounds[i], bounds[i + 1])) for i, worker in enumerate(workers)]
+
+    def iter_pages(self, data: bytes, outcome: dict | None = None):
+        """
+        Yields {"page", "text", "seconds"} for each extracted page, in page order, as soon as
+        it and every page before it have arrived.
+
+        Stopping the iteration early kills the workers still busy with the document, so a
+        caller that has read enough pays for nothing more. Time the caller spends between
+        pages counts against the deadline. When the iteration ends, `outcome` (if given)
+        receives "page_count", "status" and "error" as described for `extract`. Raises
+        ValueError when the file cannot be read as a PDF at all.
+        """
+        pages, outcomes, errors = {}, set(), []
+        page_count = None
+        next_page = 0
+        first = self._acquire()
+        # The clock starts once a worker is assigned; waiting for a free one is not the document's fault.
+        deadline = time.monotonic() + self.timeout
+        first.conn.send((data, 0, self.parallel_threshold, self.max_pages))
+        active = {first.conn: first}
+        # Pages still to extract once the first worker is free again, when no other worker was idle.
+        follow_up = None
+        try:
+            while active:
+                remaining = deadline - time.monotonic()
+                ready = wait(list(active), timeout=max(0.0, remaining)) if remaining > 0 else []
+                if not ready:
+                    outcomes.add("timeout")
+                    break
+                for conn in ready:
+                    worker = active[conn]
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError):
+                        del active[conn]
+                        outcomes.add("crashed")
+                        self._release(worker, healthy=False)
+                        continue
+                    kind = message[0]
+                    if kind == "page":
+                        _, index, text, seconds = message
+                        pages[index] = {"page": index + 1, "text": text, "seconds": seconds}
+                        while next_page in pages:
+                            next_page += 1
+                            yield pages[next_page - 1]
+                    elif kind == "count" and worker is first and page_count is None:
+                        page_count = message[1]
+                        limit = min(page_count, self.max_pages)
+                        if limit > self.parallel_threshold:
+                            assignments = self._split(self.parallel_threshold, limit)
+                            for extra, (start, stop) in assignments:
+                                extra.conn.send((data, start, stop, self.max_pages))
+                                active[extra.conn] = extra
+                            if not assignments:
+                                follow_up = (self.parallel_threshold, limit)
+                    elif kind == "done":
+                        if worker is first and follow_up:
+                            first.conn.send((data, *follow_up, self.max_pages))
+                            follow_up = None
+                            continue
+                        del active[conn]
+                        self._release(worker, healthy=True)
+                    elif kind == "error":
+                        del active[conn]
+                        outcomes.add(message[1])
+                        errors.append(message[2])
+                        self._release(worker, healthy=message[1] == "invalid")
+        finally:
+            # Whatever is still running overran the deadline (or the caller stopped early): kill it.
+            for worker in active.values():
+                self._release(worker, healthy=False)
+
+        # After a failure, pages past a gap (from another worker's range) are still worth returning.
+        for index in sorted(index for index in pages if index >= next_page):
+            yield pages[index]
+
+        if page_count is not None and page_count > self.max_pages:
+            outcomes.add("page_limit")
+        status = next((outcome for outcome in OUTCOMES if outcome in outcomes), "ok")
+        with self._cond:
+            self.stats["documents"] += 1
+            self.stats[status] += 1
+        if status == "invalid" and not pages:
+            raise ValueError(f"Could not read the PDF: {errors[0]}")
+        if outcome is not None:
+            outcome.update(page_count=page_count, status=status, error=errors[0] if errors else None)
+
+    def extract(self, data: bytes) -> dict:
+        """
+        Returns {"pages": [{"page", "text", "seconds"}, ...], "page_count", "status", "error"}.
+
+        `status` is "ok", "page_limit" (pages beyond `max_pages` were skipped) or, with
+        whatever pages were extracted before it happened, "timeout", "memory" or "crashed".
+        Raises ValueError when the file cannot be read as a PDF at all.
+        """
+        outcome = {}
+        pages = list(self.iter_pages(data, outcome))
+        return {"pages": pages, **outcome}
+
+    def shutdown(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+        for worker in idle:
+            worker.kill()
+
+    def format_stats(self) -> str:
+        stats = self.stats
+        return (f"📄 PDF extraction: {stats['documents']} documents, {stats['timeout']} timed out, "
+                f"{stats['memory']} over the memory limit, {stats['crashed']} crashed, "
+                f"{stats['page_limit']} cut at {self.max_pages} pages")
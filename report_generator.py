@@ -1,25 +1,71 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from fpdf import FPDF
+from __future__ import annotations
+import hashlib
+import importlib
+import json
+import threading
+import zipfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from io import BytesIO
+from lazy_imports import lazy_module
+from artifact_store import artifact_store
+import telemetry
 
-class PDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 14)
-        self.cell(0, 10, 'AI-Fit Score & Competency Report', 0, 0, 'C')
-        self.ln(15)
+def _use_headless_backend():
+    # Charts are only ever saved to PNG; never start a GUI backend.
+    importlib.import_module("matplotlib").use("Agg")
 
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+pd = lazy_module("pandas")
+np = lazy_module("numpy")
+plt = lazy_module("matplotlib.pyplot", on_load=_use_headless_backend)
+fpdf = lazy_module("fpdf")
 
-def create_radar_chart(data: pd.DataFrame) -> BytesIO | None:
-    """Creates a visually enhanced radar chart."""
-    if data.empty or 'Competency Rating (1-10)' not in data.columns: return None
+RATING_COLUMN = 'Competency Rating (1-10)'
+MAX_BAR_CHART_HEIGHT = 12  # inches
+CHART_CACHE_ENTRIES = 256
+REPORT_CACHE_ENTRIES = 32
+# Candidates whose charts are rendered together by the process pool when writing batch reports.
+REPORT_CHART_BATCH = 16
+
+# Both caches map an input digest to an artifact store reference; the bytes live in the store,
+# under its global memory and disk caps, and a lookup misses once the store has evicted them.
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+_report_cache = OrderedDict()
+_report_cache_lock = threading.Lock()
+# Most recent renders: chart kind, render seconds, PNG size and whether it was a cache hit.
+chart_render_stats = deque(maxlen=500)
+# Running totals per (chart kind, cache hit) for the metrics export.
+_chart_totals = {}
+_chart_totals_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def _pdf_class():
+    # Defined on first use so fpdf is only imported when a report is actually built.
+    class PDF(fpdf.FPDF):
+        def header(self):
+            self.set_font('Arial', 'B', 14)
+            self.cell(0, 10, 'AI-Fit Score & Competency Report', 0, 0, 'C')
+            self.ln(15)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    return PDF
+
+def dataframe_digest(data: pd.DataFrame) -> str:
+    """Hashes a DataFrame's columns and values, so identical competency matrices share a key."""
+    digest = hashlib.sha256("\x1f".join(map(str, data.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(data.astype(str), index=False).values.tobytes())
+    return digest.hexdigest()
+
+def _render_radar_png(data: pd.DataFrame) -> bytes:
     labels = data['Skill/Keyword'].values
-    stats = data['Competency Rating (1-10)'].astype(float).values
+    stats = data[RATING_COLUMN].astype(float).values
     angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False).tolist()
     stats = np.concatenate((stats, [stats[0]]))
     angles += angles[:1]
@@ -33,33 +79,185 @@ def create_radar_chart(data: pd.DataFrame) -> BytesIO | None:
     ax.set_title('Competency Radar', size=16, y=1.1)
     
     buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
+    fig.savefig(buf, format='png', bbox_inches='tight')
     plt.close(fig)
-    return buf
+    return buf.getvalue()
 
-def create_bar_chart(data: pd.DataFrame) -> BytesIO | None:
-    """Creates a horizontal bar chart of competency ratings."""
-    if data.empty or 'Competency Rating (1-10)' not in data.columns: return None
-    
-    data = data.sort_values('Competency Rating (1-10)', ascending=True)
+def _bar_chart_rows(data: pd.DataFrame) -> pd.DataFrame:
+    """Returns the matrix with numeric ratings, lowest first (batch records store ratings as strings)."""
+    data = data.assign(**{RATING_COLUMN: pd.to_numeric(data[RATING_COLUMN], errors="coerce")})
+    return data.sort_values(RATING_COLUMN, ascending=True)
+
+def _render_bar_png(data: pd.DataFrame) -> bytes:
+    data = _bar_chart_rows(data)
     labels = data['Skill/Keyword'].values
-    stats = data['Competency Rating (1-10)'].astype(float).values
+    stats = data[RATING_COLUMN].values
     
-    fig, ax = plt.subplots(figsize=(10, len(labels) * 0.5))
+    height = min(max(len(labels) * 0.5, 2), MAX_BAR_CHART_HEIGHT)
+    fig, ax = plt.subplots(figsize=(10, height))
     ax.barh(labels, stats, color='#007bff')
+    if len(labels) * 0.5 > MAX_BAR_CHART_HEIGHT:
+        # Shrink the labels instead of growing the figure for long skill lists.
+        ax.tick_params(axis='y', labelsize=max(4, int(10 * MAX_BAR_CHART_HEIGHT / (len(labels) * 0.5))))
     ax.set_xlabel('Rating (out of 10)')
     ax.set_title('Competency Ratings')
     ax.set_xlim(0, 10)
-    plt.tight_layout()
+    fig.tight_layout()
 
     buf = BytesIO()
-    plt.savefig(buf, format='png')
+    fig.savefig(buf, format='png')
     plt.close(fig)
-    return buf
+    return buf.getvalue()
+
+_RENDERERS = {"radar": _render_radar_png, "bar": _render_bar_png}
+
+def _cache_chart(key: tuple, png: bytes) -> None:
+    ref = artifact_store.put(png)
+    with _chart_cache_lock:
+        _chart_cache[key] = ref
+        _chart_cache.move_to_end(key)
+        while len(_chart_cache) > CHART_CACHE_ENTRIES:
+            _chart_cache.popitem(last=False)
+
+def _cached_chart(key: tuple) -> bytes | None:
+    with _chart_cache_lock:
+        ref = _chart_cache.get(key)
+        if ref is not None:
+            _chart_cache.move_to_end(key)
+    return artifact_store.get(ref)
+
+def _note_render(kind: str, seconds: float, png: bytes, cached: bool) -> None:
+    chart_render_stats.append({"chart": kind, "seconds": seconds, "png_bytes": len(png), "cached": cached})
+    with _chart_totals_lock:
+        totals = _chart_totals.setdefault((kind, cached), {"renders": 0, "png_bytes": 0})
+        totals["renders"] += 1
+        totals["png_bytes"] += len(png)
+    telemetry.record("chart_render", seconds, chart=kind, cached=cached, png_bytes=len(png))
+
+def _chart_png(kind: str, data: pd.DataFrame) -> bytes:
+    key = (kind, dataframe_digest(data))
+    started = time.perf_counter()
+    png = _cached_chart(key)
+    cached = png is not None
+    if not cached:
+        png = _RENDERERS[kind](data)
+        _cache_chart(key, png)
+    _note_render(kind, time.perf_counter() - started, png, cached)
+    return png
+
+def create_radar_chart(data: pd.DataFrame) -> BytesIO | None:
+    """Creates a visually enhanced radar chart."""
+    if data.empty or RATING_COLUMN not in data.columns: return None
+    return BytesIO(_chart_png("radar", data))
+
+def create_bar_chart(data: pd.DataFrame) -> BytesIO | None:
+    """Creates a horizontal bar chart of competency ratings."""
+    if data.empty or RATING_COLUMN not in data.columns: return None
+    return BytesIO(_chart_png("bar", data))
+
+def _render_charts(data: pd.DataFrame) -> dict[str, tuple[bytes, float]]:
+    """Renders both charts of one matrix (in a pool worker); returns {kind: (png, seconds)}."""
+    rendered = {}
+    for kind, renderer in _RENDERERS.items():
+        started = time.perf_counter()
+        rendered[kind] = (renderer(data), time.perf_counter() - started)
+    return rendered
+
+def render_charts_batch(frames: list[pd.DataFrame], max_workers: int | None = None,
+                        pool: ProcessPoolExecutor | None = None) -> list[tuple[BytesIO | None, BytesIO | None]]:
+    """
+    Renders the radar and bar chart of many competency matrices in a process pool.
+
+    Returns one (radar, bar) pair per DataFrame, in input order. Matrices already in the
+    chart cache are not re-rendered, and the results are added to the cache. Pass `pool`
+    to reuse one across calls; otherwise a pool of `max_workers` is started for this call.
+    """
+    results = [None] * len(frames)
+    todo = {}
+    for i, data in enumerate(frames):
+        if data.empty or RATING_COLUMN not in data.columns:
+            results[i] = (None, None)
+            continue
+        digest = dataframe_digest(data)
+        radar, bar = _cached_chart(("radar", digest)), _cached_chart(("bar", digest))
+        if radar is not None and bar is not None:
+            _note_render("radar", 0.0, radar, True)
+            _note_render("bar", 0.0, bar, True)
+            results[i] = (BytesIO(radar), BytesIO(bar))
+        else:
+            todo.setdefault(digest, []).append(i)
+
+    if todo:
+        own_pool = pool is None
+        pool = ProcessPoolExecutor(max_workers=max_workers) if own_pool else pool
+        try:
+            rendered = pool.map(_render_charts, [frames[indices[0]] for indices in todo.values()])
+            for (digest, indices), charts in zip(todo.items(), rendered):
+                for kind, (png, seconds) in charts.items():
+                    _cache_chart((kind, digest), png)
+                    _note_render(kind, seconds, png, False)
+                for i in indices:
+                    results[i] = (BytesIO(charts["radar"][0]), BytesIO(charts["bar"][0]))
+        finally:
+            if own_pool:
+                pool.shutdown()
+    return results
+
+def chart_render_totals() -> list[dict]:
+    """Renders and PNG bytes so far per chart kind and cache hit, for the metrics export."""
+    with _chart_totals_lock:
+        return [{"chart": kind, "cached": cached, **totals} for (kind, cached), totals in sorted(_chart_totals.items())]
+
+def format_chart_stats() -> str | None:
+    """Summarizes the recent renders (time and PNG size), or None before the first chart."""
+    rendered = [entry for entry in list(chart_render_stats) if not entry["cached"]]
+    hits = len(chart_render_stats) - len(rendered)
+    if not chart_render_stats:
+        return None
+    if not rendered:
+        return f"🖼️ Charts: {hits} recent charts, all from cache"
+    seconds = sorted(entry["seconds"] for entry in rendered)
+    png_kb = sum(entry["png_bytes"] for entry in rendered) / len(rendered) / 1024
+    return (f"🖼️ Charts: {len(rendered)} recently rendered (median {seconds[len(seconds) // 2] * 1000:.0f} ms, "
+            f"slowest {seconds[-1] * 1000:.0f} ms, {png_kb:.0f} KB PNG on average), {hits} from cache")
+
+def _latin1(text: str) -> str:
+    # The core PDF fonts only cover latin-1; unsupported characters become '?'.
+    return text.encode('latin-1', 'replace').decode('latin-1')
 
 def create_pdf_report(analysis_text: str, competency_df: pd.DataFrame, radar_chart: BytesIO, bar_chart: BytesIO) -> bytes:
-    """Generates a professional PDF report with multiple visualizations."""
-    pdf = PDF()
+    """
+    Generates a professional PDF report with multiple visualizations.
+
+    Reports are memoized by a hash of the text, the DataFrame and the chart bytes, so asking
+    again for the same analysis returns the already built document.
+    """
+    radar_png = radar_chart.getvalue() if radar_chart else None
+    bar_png = bar_chart.getvalue() if bar_chart else None
+    digest = hashlib.sha256(analysis_text.encode("utf-8"))
+    digest.update(dataframe_digest(competency_df).encode("ascii"))
+    for png in (radar_png, bar_png):
+        digest.update(hashlib.sha256(png or b"").digest())
+    key = digest.hexdigest()
+    with _report_cache_lock:
+        ref = _report_cache.get(key)
+        if ref is not None:
+            _report_cache.move_to_end(key)
+    report = artifact_store.get(ref)
+    if report is not None:
+        return report
+
+    with telemetry.span("pdf_report"):
+        report = _build_pdf_report(analysis_text, competency_df, radar_png, bar_png)
+    ref = artifact_store.put(report)
+    with _report_cache_lock:
+        _report_cache[key] = ref
+        while len(_report_cache) > REPORT_CACHE_ENTRIES:
+            _report_cache.popitem(last=False)
+    return report
+
+def _build_pdf_report(analysis_text: str, competency_df: pd.DataFrame, radar_png: bytes | None, bar_png: bytes | None) -> bytes:
+    pdf = _pdf_class()()
     pdf.add_page()
 
     # Add Analysis Text First
@@ -67,8 +265,7 @@ def create_pdf_report(analysis_text: str, competency_df: pd.DataFrame, radar_cha
     pdf.cell(0, 10, "Analysis & Review", ln=True)
     pdf.set_font("Arial", size=11)
     # Encode with error handling to prevent crashes on unsupported characters
-    safe_analysis_text = analysis_text.encode('latin-1', 'replace').decode('latin-1')
-    pdf.multi_cell(0, 8, safe_analysis_text)
+    pdf.multi_cell(0, 8, _latin1(analysis_text))
     pdf.ln(10)
 
     # Add Competency Matrix Table
@@ -84,21 +281,72 @@ def create_pdf_report(analysis_text: str, competency_df: pd.DataFrame, radar_cha
         pdf.ln()
 
         pdf.set_font("Arial", size=9)
-        for _, row in competency_df.iterrows():
-            pdf.cell(col_widths[0], 10, str(row.iloc[0]), 1)
-            pdf.cell(col_widths[1], 10, str(row.iloc[1]), 1, align='C')
-            pdf.cell(col_widths[2], 10, str(row.iloc[2]), 1, align='C')
-            pdf.multi_cell(col_widths[3], 10, str(row.iloc[3]), 1)
+        # Convert the whole table to plain latin-1 strings once instead of boxing every row as a Series.
+        cells = competency_df.iloc[:, :4].astype(str).replace({'✅': 'Yes', '❌': 'No'}, regex=True)
+        for skill, present, rating, suggestion in cells.to_numpy().tolist():
+            pdf.cell(col_widths[0], 10, _latin1(skill), 1)
+            pdf.cell(col_widths[1], 10, _latin1(present), 1, align='C')
+            pdf.cell(col_widths[2], 10, _latin1(rating), 1, align='C')
+            pdf.multi_cell(col_widths[3], 10, _latin1(suggestion), 1)
         pdf.ln(10)
 
     # Add Visualizations on a new page if they exist
-    if radar_chart or bar_chart:
+    if radar_png or bar_png:
         pdf.add_page()
         pdf.set_font("Arial", 'B', 16)
         pdf.cell(0, 10, "Visualizations", ln=True)
-        if radar_chart:
-            pdf.image(radar_chart, x=10, y=pdf.get_y(), w=pdf.w / 2 - 15)
-        if bar_chart:
-            pdf.image(bar_chart, x=pdf.w / 2 + 5, y=pdf.get_y(), w=pdf.w / 2 - 15)
+        if radar_png:
+            pdf.image(BytesIO(radar_png), x=10, y=pdf.get_y(), w=pdf.w / 2 - 15)
+        if bar_png:
+            pdf.image(BytesIO(bar_png), x=pdf.w / 2 + 5, y=pdf.get_y(), w=pdf.w / 2 - 15)
+
+    return bytes(pdf.output(dest='S'))
+
+def write_candidate_reports(records, zip_path: str, max_workers: int | None = None) -> int:
+    """
+    Writes one PDF report per candidate into a zip archive, a few candidates at a time.
+
+    `records` is an iterable of batch results (dicts with candidate_id, report and
+    competency_matrix). Charts are rendered in a process pool, REPORT_CHART_BATCH candidates
+    per round, so only that many candidates' documents are held in memory while the archive
+    grows on disk. Returns the number of reports written.
+    """
+    written = 0
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+        index = []
+        batch = []
+
+        def flush():
+            nonlocal written
+            frames = [pd.DataFrame(record.get("competency_matrix") or []) for record in batch]
+            for record, df, (radar, bar) in zip(batch, frames, render_charts_batch(frames, pool=pool)):
+                name = f"{record['candidate_id']}.pdf"
+                archive.writestr(name, _build_pdf_report(record.get("report", ""), df, radar.getvalue() if radar else None,
+                                                         bar.getvalue() if bar else None))
+                index.append({"candidate_id": record["candidate_id"], "file": record.get("file"),
+                              "match_score": record.get("match_score"), "report": name})
+                written += 1
+            batch.clear()
+
+        for record in records:
+            if record.get("status") != "ok":
+                continue
+            batch.append(record)
+            if len(batch) >= REPORT_CHART_BATCH:
+                flush()
+        if batch:
+            flush()
+        archive.writestr("index.json", json.dumps(index, indent=2, ensure_ascii=False))
+    return written
+
+def _collect_chart_renders():
+    return [({"chart": row["chart"], "cached": str(row["cached"]).lower()}, row["renders"]) for row in chart_render_totals()]
+
+def _collect_chart_bytes():
+    return [({"chart": row["chart"], "cached": str(row["cached"]).lower()}, row["png_bytes"]) for row in chart_render_totals()]
 
-    return bytes(pdf.output(dest='S'))
\ No newline at end of file
+telemetry.register_collector("resume_tools_chart_renders_total", "counter",
+                             "Charts produced, by kind and whether they came from the chart cache.", _collect_chart_renders)
+telemetry.register_collector("resume_tools_chart_png_bytes_total", "counter",
+                             "PNG bytes of the charts produced, by kind and cache hit.", _collect_chart_bytes)
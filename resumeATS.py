@@ -1,140 +1,251 @@
-import streamlit as st
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from linkedin_scraper import get_jd_from_linkedin
-from report_generator import create_pdf_report
-import pandas as pd
-
-# --- CONFIGURATION ---
-st.set_page_config(page_title="Advanced ATS Resume Checker - Human Resources Information System", layout="wide", initial_sidebar_state="auto")
-load_dotenv()
-
-# Configure Gemini API
-try:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-except (AttributeError, TypeError):
-    st.error("🚨 Google API Key not found. Please ensure it's set in your .env file.")
-    st.stop()
-
-# --- MODEL AND PROMPTS ---
-model = genai.GenerativeModel("gemini-2.5-flash-lite")
-
-prompt_templates = {
-    "Similarity Score": """
-        You are an expert ATS. Analyze the resume against the job description.
-        - **Overall Match Score:** Provide a percentage score.
-        - **✅ Skills Matched:** List the key skills found in both the resume and JD.
-        - **❌ Skills Missing:** List critical skills from the JD that are missing in the resume.
-        - **📈 Recommended Additions:** Suggest specific skills or keywords to add.
-        Resume: {resume_text}
-        Job Description: {jd_text}
-        """,
-    "Competency Matrix": """
-        You are an expert ATS. Create a competency matrix comparing the resume to the job description.
-        The output should be a markdown table with the following columns:
-        - Skill/Keyword
-        - Present in Resume (✅/❌)
-        - Competency Rating (1-10)
-        - Suggestion to Improve
-        Resume: {resume_text}
-        Job Description: {jd_text}
-        """,
-    "Improvement Suggestions": """
-        You are an expert career coach. Provide a detailed, bullet-pointed list of suggestions to improve the resume based on the job description.
-        Focus on action verbs, quantifiable achievements, and tailoring.
-        Resume: {resume_text}
-        Job Description: {jd_text}
-        """,
-}
-
-# --- CORE FUNCTIONS ---
-def get_gemini_response(prompt):
-    try:
-        response = model.generate_content(prompt, request_options={"timeout": 120})
-        return response.text
-    except Exception as e:
-        st.error(f"🚨 API Error: {e}")
-        return None
-
-def extract_text_from_pdf(uploaded_file):
-    if uploaded_file:
-        try:
-            pdf_reader = PdfReader(uploaded_file)
-            return "".join(page.extract_text() or "" for page in pdf_reader.pages)
-        except Exception as e:
-            st.error(f"Error reading PDF file: {e}")
-    return None
-
-# --- UI LAYOUT ---
-def main():
-    st.markdown("""
-    <style>
-        .main .block-container { padding: 1rem 3rem; }
-        h1 { font-size: 2.8rem; font-weight: 700; }
-        h2 { font-size: 1.9rem; font-weight: 600; border-bottom: 3px solid #007bff; padding-bottom: 0.4rem; }
-    </style>
-    """, unsafe_allow_html=True)
-
-    with st.sidebar:
-        st.header("⚙️ Inputs & Analysis")
-        st.subheader("1. Job Description")
-        jd_input_method = st.radio("Source:", ["Paste Manually", "Upload PDF", "LinkedIn URL"], key="jd_source")
-        job_description = ""
-        if jd_input_method == "Paste Manually":
-            job_description = st.text_area("Paste the job description:", height=150, label_visibility="collapsed")
-        elif jd_input_method == "Upload PDF":
-            jd_file = st.file_uploader("Upload JD (PDF)", type=["pdf"], label_visibility="collapsed")
-            if jd_file:
-                job_description = extract_text_from_pdf(jd_file)
-        else:
-            linkedin_url = st.text_input("Enter LinkedIn job URL:", label_visibility="collapsed")
-            if linkedin_url:
-                job_description = get_jd_from_linkedin(linkedin_url)
-
-        st.subheader("2. Your Resume")
-        resume_file = st.file_uploader("Upload your resume (PDF)", type=["pdf"], label_visibility="collapsed")
-
-        st.subheader("3. Analysis Type")
-        analysis_type = st.selectbox("Select:", list(prompt_templates.keys()), label_visibility="collapsed")
-        
-        analyze_button = st.button("Analyze Resume", use_container_width=True, type="primary")
-
-    st.title("🚀 Advanced ATS Resume Checker")
-    st.markdown("Get AI-powered feedback to optimize your resume and beat the bots.")
-
-    if 'analysis_result' not in st.session_state:
-        st.session_state.analysis_result = ""
-
-    if analyze_button:
-        if job_description and resume_file:
-            with st.spinner(f"Running '{analysis_type}' analysis..."):
-                resume_text = extract_text_from_pdf(resume_file)
-                if not resume_text:
-                    st.error("Could not extract text from resume.")
-                    st.stop()
-                
-                prompt = prompt_templates[analysis_type].format(jd_text=job_description, resume_text=resume_text)
-                st.session_state.analysis_result = get_gemini_response(prompt)
-        else:
-            st.warning("Please provide a job description and a resume in the sidebar.")
-
-    if st.session_state.analysis_result:
-        st.header("📊 Analysis Report")
-        st.markdown(st.session_state.analysis_result)
-        
-        empty_df = pd.DataFrame() # This tool doesn't generate a competency matrix for the PDF report
-        pdf_report = create_pdf_report(st.session_state.analysis_result, empty_df, None, None)
-        st.download_button(
-            label="📥 Download Report as PDF",
-            data=pdf_report,
-            file_name=f"{analysis_type.replace(' ', '_')}_Report.pdf",
-            mime="application/pdf",
-            use_container_width=True
-        )
-    else:
-        st.info("Provide your details in the sidebar and click 'Analyze' to begin.")
-
-if __name__ == "__main__":
-    main()
+import streamlit as st
+from pdf_extract import document_text, extract_document, format_extraction_notice
+from linkedin_scraper import get_jd_from_linkedin
+from report_generator import create_pdf_report
+from gemini_client import MODEL_NAME, TextStream, generate_text, get_model, response_cache
+from local_scorer import score_resumes, format_local_report
+from text_preprocess import prepare_inputs, format_token_stats
+from model_scheduler import scheduler
+from ats_prompts import PROMPT_VERSION, prompt_templates
+from jd_dedup import find_reusable, format_reuse_notice, remember_result
+from lazy_imports import lazy_module
+from metrics_panel import render_metrics_panel
+from artifact_store import artifact_store
+from background_jobs import background_jobs
+from job_panel import active_job, finished_job, render_job_progress, session_owner, show_job_outcome
+import telemetry
+import contextvars
+import time
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+pd = lazy_module("pandas")
+
+# --- CONFIGURATION ---
+st.set_page_config(page_title="Advanced ATS Resume Checker - Human Resources Information System", layout="wide", initial_sidebar_state="auto")
+
+# Configure Gemini API. The client is created once per process and reused by every rerun.
+try:
+    model = get_model(MODEL_NAME)
+except RuntimeError:
+    st.error("🚨 Google API Key not found. Please ensure it's set in your .env file.")
+    st.stop()
+
+# --- ANALYSIS MODES ---
+# Runs entirely on this machine, without a model call.
+LOCAL_SCORE_MODE = "Local Score (instant, no AI)"
+# Runs every prompt template concurrently and merges the answers into one report.
+ALL_ANALYSES_MODE = "All analyses"
+
+# --- CORE FUNCTIONS ---
+# These run on the background executor, so they report through `job` instead of calling Streamlit.
+def stream_gemini_response(job, prompt, use_cache=True):
+    """Publishes the answer as the job's partial result while it streams in; returns the text and its timings."""
+    stream = TextStream(model, prompt, PROMPT_VERSION, timeout=120, use_cache=use_cache)
+    text_so_far = ""
+    try:
+        for chunk in stream:
+            text_so_far += chunk
+            job.progress(partial=text_so_far)
+            job.check_cancelled()
+    finally:
+        stream.close()
+    return stream.text, {
+        "time_to_first_token": stream.time_to_first_token,
+        "total_time": stream.total_time,
+        "from_cache": stream.from_cache,
+    }
+
+def run_all_analyses(job, job_description, resume_text, use_cache=True):
+    """
+    Sends every prompt template at once, publishes each section as soon as it is ready and
+    returns the sections merged into one report, in template order.
+    """
+    sections, failed = {}, {}
+    pool = ThreadPoolExecutor(max_workers=len(prompt_templates))
+    try:
+        futures = {
+            # Each task runs in a copy of this context so its spans keep the request's trace labels.
+            pool.submit(contextvars.copy_context().run, generate_text, model, template.format(jd_text=job_description, resume_text=resume_text),
+                        PROMPT_VERSION, 120, use_cache): name
+            for name, template in prompt_templates.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                sections[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+            done = [f"### {name}\n\n{sections[name]}" for name in prompt_templates if name in sections]
+            job.progress(f"{len(sections) + len(failed)} of {len(prompt_templates)} analyses done...", "\n\n".join(done))
+            job.check_cancelled()
+    finally:
+        # After a cancel, calls already sent finish in the background and still land in the response cache.
+        pool.shutdown(wait=False, cancel_futures=True)
+    if not sections:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+    report = "\n\n".join(f"## {name}\n\n{sections[name]}" for name in prompt_templates if name in sections)
+    return report, [f"🚨 API Error in '{name}': {error}" for name, error in failed.items()]
+
+def run_analysis(job, analysis_type, job_description, resume_pdf, use_cache=True, stream_output=True,
+                 reuse_similar_jd=True):
+    """Background job behind the Analyze button; returns what the report view needs."""
+    job.progress("Reading your resume...")
+    document = extract_document(resume_pdf)
+    notice = format_extraction_notice(document)
+    notices = [notice] if notice else []
+    resume_text = document_text(document)
+    if not resume_text:
+        raise ValueError("Could not extract text from resume.")
+    job.check_cancelled()
+
+    outcome = {"analysis_type": analysis_type, "notices": notices, "stream_stats": None, "all_analyses_time": None,
+               "token_stats": None, "jd_reuse": None}
+    if analysis_type == LOCAL_SCORE_MODE:
+        analysis_result = format_local_report(score_resumes(job_description, [resume_text])[0])
+    else:
+        jd_text, resume_text, outcome["token_stats"] = prepare_inputs(job_description, resume_text)
+        analysis_key = f"{PROMPT_VERSION}:{analysis_type}"
+        reuse = find_reusable(jd_text, resume_text, analysis_key) if reuse_similar_jd and use_cache else None
+        job.progress(f"Running '{analysis_type}' analysis...")
+        failures = []
+        if reuse:
+            analysis_result = reuse.pop("result")
+            outcome["jd_reuse"] = reuse
+        elif analysis_type == ALL_ANALYSES_MODE:
+            started = time.perf_counter()
+            analysis_result, failures = run_all_analyses(job, jd_text, resume_text, use_cache=use_cache)
+            notices.extend(failures)
+            outcome["all_analyses_time"] = time.perf_counter() - started
+        else:
+            prompt = prompt_templates[analysis_type].format(jd_text=jd_text, resume_text=resume_text)
+            if stream_output:
+                analysis_result, outcome["stream_stats"] = stream_gemini_response(job, prompt, use_cache=use_cache)
+            else:
+                analysis_result = generate_text(model, prompt, PROMPT_VERSION, timeout=120, use_cache=use_cache)
+        # Only complete reports are offered for reuse, so failed sections are retried next time.
+        if analysis_result and not reuse and not failures:
+            remember_result(jd_text, resume_text, analysis_key, analysis_result)
+    outcome["analysis_ref"] = artifact_store.put_text(analysis_result) if analysis_result else None
+    return outcome
+
+def extract_text_from_pdf(uploaded_file):
+    if uploaded_file:
+        try:
+            document = extract_document(uploaded_file)
+            notice = format_extraction_notice(document)
+            if notice:
+                st.warning(notice)
+            return document_text(document)
+        except Exception as e:
+            st.error(f"Error reading PDF file: {e}")
+    return None
+
+# --- UI LAYOUT ---
+def main():
+    st.markdown("""
+    <style>
+        .main .block-container { padding: 1rem 3rem; }
+        h1 { font-size: 2.8rem; font-weight: 700; }
+        h2 { font-size: 1.9rem; font-weight: 600; border-bottom: 3px solid #007bff; padding-bottom: 0.4rem; }
+    </style>
+    """, unsafe_allow_html=True)
+
+    with st.sidebar:
+        st.header("⚙️ Inputs & Analysis")
+        st.subheader("1. Job Description")
+        jd_input_method = st.radio("Source:", ["Paste Manually", "Upload PDF", "LinkedIn URL"], key="jd_source")
+        job_description = ""
+        if jd_input_method == "Paste Manually":
+            job_description = st.text_area("Paste the job description:", height=150, label_visibility="collapsed")
+        elif jd_input_method == "Upload PDF":
+            jd_file = st.file_uploader("Upload JD (PDF)", type=["pdf"], label_visibility="collapsed")
+            if jd_file:
+                job_description = extract_text_from_pdf(jd_file)
+        else:
+            linkedin_url = st.text_input("Enter LinkedIn job URL:", label_visibility="collapsed")
+            if linkedin_url:
+                job_description = get_jd_from_linkedin(linkedin_url)
+
+        st.subheader("2. Your Resume")
+        resume_file = st.file_uploader("Upload your resume (PDF)", type=["pdf"], label_visibility="collapsed")
+
+        st.subheader("3. Analysis Type")
+        analysis_type = st.selectbox("Select:", list(prompt_templates.keys()) + [ALL_ANALYSES_MODE, LOCAL_SCORE_MODE], label_visibility="collapsed")
+        bypass_cache = st.checkbox("Bypass cache (force a fresh analysis)", value=False)
+        stream_output = st.checkbox("Stream the answer as it is written", value=True)
+        reuse_similar_jd = st.checkbox("Reuse results for near-identical job descriptions", value=True,
+                                       help="Serves an earlier analysis of this resume when the job description is a repost or a lightly edited copy.")
+        
+        analyze_button = st.button("Analyze Resume", use_container_width=True, type="primary")
+
+        cache_stats = response_cache.stats()
+        st.caption(f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, {cache_stats['entries']} stored answers")
+        st.caption(scheduler.format_stats())
+        st.caption(background_jobs.format_load())
+
+    st.title("🚀 Advanced ATS Resume Checker")
+    st.markdown("Get AI-powered feedback to optimize your resume and beat the bots.")
+
+    if 'analysis_ref' not in st.session_state:
+        # The report text lives in the shared artifact store; the session only keeps its reference.
+        st.session_state.analysis_ref = None
+
+    # Analyses run on a background executor under this tab's key, so a reload picks them up again.
+    owner = session_owner()
+    if analyze_button:
+        if job_description and resume_file:
+            background_jobs.submit(owner, analysis_type, run_analysis, analysis_type, job_description,
+                                   resume_file.getvalue(), use_cache=not bypass_cache, stream_output=stream_output,
+                                   reuse_similar_jd=reuse_similar_jd)
+        else:
+            st.warning("Please provide a job description and a resume in the sidebar.")
+
+    job = finished_job(owner)
+    if job is not None:
+        if job.status == "done":
+            for notice in job.result["notices"]:
+                st.warning(notice)
+            st.session_state.update({key: value for key, value in job.result.items() if key != "notices"})
+        else:
+            show_job_outcome(job)
+    job = active_job(owner)
+    if job is not None:
+        render_job_progress(job.id)
+
+    analysis_result = artifact_store.get_text(st.session_state.analysis_ref)
+    if st.session_state.analysis_ref and analysis_result is None:
+        st.session_state.analysis_ref = None
+        st.warning("This report was cleared from the server to free memory. Please run the analysis again; "
+                   "cached answers make it quick.")
+    if analysis_result:
+        st.header("📊 Analysis Report")
+        if st.session_state.get("jd_reuse"):
+            st.info(format_reuse_notice(st.session_state.jd_reuse))
+        st.markdown(analysis_result)
+        stream_stats = st.session_state.get("stream_stats")
+        if stream_stats and stream_stats["time_to_first_token"] is not None:
+            source = " (from cache)" if stream_stats["from_cache"] else ""
+            st.caption(f"⏱️ First token after {stream_stats['time_to_first_token']:.2f}s, full answer after {stream_stats['total_time']:.2f}s{source}")
+        if st.session_state.get("all_analyses_time"):
+            st.caption(f"⏱️ {len(prompt_templates)} analyses completed in {st.session_state.all_analyses_time:.2f}s")
+        if st.session_state.get("token_stats"):
+            st.caption(format_token_stats(st.session_state.token_stats))
+        
+        empty_df = pd.DataFrame() # This tool doesn't generate a competency matrix for the PDF report
+        # The PDF is only built (and then memoized) when the download is clicked, not on every rerun.
+        st.download_button(
+            label="📥 Download Report as PDF",
+            data=partial(create_pdf_report, analysis_result, empty_df, None, None),
+            file_name=f"{st.session_state.get('analysis_type', analysis_type).replace(' ', '_')}_Report.pdf",
+            mime="application/pdf",
+            use_container_width=True
+        )
+    elif job is None:
+        st.info("Provide your details in the sidebar and click 'Analyze' to begin.")
+
+    if telemetry.ADMIN_ENABLED:
+        render_metrics_panel()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+from gemini_client import cache_answer, cached_answer, generate_text
+from competency_analysis import (JSON_CONFIG, PROMPT_VERSION, SECTION_SCHEMAS, _load_json, analyze_competency,
+                                 build_prompt, result_from_sections, validate_sections)
+from jd_dedup import remember_result
+from model_scheduler import INTERACTIVE
+from text_preprocess import estimate_tokens
+import telemetry
+
+# Bump when the packed template below changes so cached packed answers are not reused.
+PACK_PROMPT_VERSION = f"{PROMPT_VERSION}:packed-v1"
+
+# Input tokens one packed prompt may use: the job description once plus as many resumes as fit.
+PACK_INPUT_TOKENS = int(os.getenv("RESUME_TOOLS_PACK_TOKENS", 12000))
+# Answer tokens one packed call may need; with the measured answer size per candidate this caps the pack size.
+PACK_OUTPUT_TOKENS = int(os.getenv("RESUME_TOOLS_PACK_OUTPUT_TOKENS", 6000))
+MAX_PACK_SIZE = int(os.getenv("RESUME_TOOLS_PACK_MAX", 8))
+# Starting guess for the answer tokens per candidate, replaced by a moving average of measured answers.
+INITIAL_ANSWER_TOKENS = 800
+
+packed_prompt_template = """
+You are an expert ATS and career strategist. Perform a complete competency mapping of each resume below against the same job description.
+Each resume starts with a line "=== CANDIDATE <id> ===". Assess every candidate on their own resume only.
+Respond with a single JSON object, and nothing else, that follows this schema:
+{{
+  "candidates": [
+    {{
+      "candidate": "<id from the resume's marker line>",
+      {matrix_schema},
+      {report_schema}
+    }}
+  ]
+}}
+- Include exactly one entry per candidate, in the order given.
+- "competency_matrix" lists every important skill or keyword from the job description.
+- "industry_benchmark_score" is the typical match for this kind of role (e.g., 75 for a senior role in tech).
+
+**Job Description:**
+{jd_text}
+
+**Resumes:**
+{resumes}
+
+**Output:**
+"""
+
+_answer_tokens = {"per_candidate": float(INITIAL_ANSWER_TOKENS)}
+_answer_lock = threading.Lock()
+
+def _candidate_block(candidate: str, resume_text: str) -> str:
+    return f"=== CANDIDATE {candidate} ===\n{resume_text}\n"
+
+def candidate_ids(count: int) -> list[str]:
+    return [f"C{i}" for i in range(1, count + 1)]
+
+def build_packed_prompt(jd_text: str, resume_texts: list[str]) -> str:
+    resumes = "\n".join(_candidate_block(candidate, text) for candidate, text in zip(candidate_ids(len(resume_texts)), resume_texts))
+    return packed_prompt_template.format(matrix_schema=SECTION_SCHEMAS["competency_matrix"],
+                                         report_schema=SECTION_SCHEMAS["report"], jd_text=jd_text, resumes=resumes)
+
+def max_pack_size() -> int:
+    """How many candidates one answer can hold, from the measured answer size per candidate."""
+    with _answer_lock:
+        per_candidate = _answer_tokens["per_candidate"]
+    return max(1, min(MAX_PACK_SIZE, int(PACK_OUTPUT_TOKENS // per_candidate)))
+
+def _observe_answer(tokens: int, candidates: int) -> None:
+    with _answer_lock:
+        _answer_tokens["per_candidate"] = 0.7 * _answer_tokens["per_candidate"] + 0.3 * (tokens / candidates)
+
+def plan_packs(jd_text: str, resume_texts: list[str], input_tokens: int = PACK_INPUT_TOKENS) -> list[list[int]]:
+    """
+    Groups resumes (by index, in order) into packs that each fit one prompt.
+
+    A pack grows while the prompt with the job description and its resumes stays within
+    `input_tokens` and the expected answer within the output budget. A resume too large
+    to share a prompt ends up in a pack of its own.
+    """
+    overhead = estimate_tokens(build_packed_prompt(jd_text, []))
+    limit = max_pack_size()
+    packs, current, used = [], [], overhead
+    for index, text in enumerate(resume_texts):
+        cost = estimate_tokens(_candidate_block(f"C{limit}", text))
+        if current and (len(current) >= limit or used + cost > input_tokens):
+            packs.append(current)
+            current, used = [], overhead
+        current.append(index)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+def split_packed_answer(text: str, candidates: list[str]) -> dict[str, tuple[dict, dict]]:
+    """Returns {candidate: (sections, errors)} for a packed answer; a candidate without an entry gets only errors."""
+    data = _load_json(text)
+    entries = data.get("candidates") if isinstance(data, dict) else None
+    entries = [entry for entry in entries if isinstance(entry, dict)] if isinstance(entries, list) else []
+    by_id = {str(entry.get("candidate", "")).strip(): entry for entry in entries}
+    if not set(candidates) <= set(by_id) and len(entries) == len(candidates):
+        # Entries without usable ids are matched by position, which the prompt asks to keep.
+        by_id = dict(zip(candidates, entries))
+    return {candidate: validate_sections(by_id.get(candidate, {})) for candidate in candidates}
+
+def tokens_saved(jd_text: str, resume_texts: list[str], packed_prompt: str) -> list[int]:
+    """
+    Estimated input tokens each candidate saved compared with its own prompt.
+
+    The packed prompt's shared part (instructions and job description) is split evenly
+    between the candidates, and each candidate is charged for its own resume block.
+    """
+    own = [estimate_tokens(_candidate_block(candidate, text))
+           for candidate, text in zip(candidate_ids(len(resume_texts)), resume_texts)]
+    shared = estimate_tokens(packed_prompt) - sum(own)
+    return [round(estimate_tokens(build_prompt(jd_text, text)) - (shared / len(resume_texts) + cost))
+            for text, cost in zip(resume_texts, own)]
+
+def is_cached(model, jd_text: str, resume_text: str) -> bool:
+    """True if this resume's single-prompt answer is already cached, so packing it would only cost tokens."""
+    return cached_answer(model, build_prompt(jd_text, resume_text), PROMPT_VERSION) is not None
+
+def analyze_pack(model, jd_text: str, resume_texts: list[str], use_cache: bool = True, timeout: int = 300,
+                 priority: int = INTERACTIVE) -> list[dict]:
+    """
+    Maps several resumes against one job description in a single model call.
+
+    Returns one `analyze_competency`-style dict per resume, in order, each with `packing`
+    ({"pack_size", "tokens_saved", "fallback"}). Every valid candidate result is also
+    stored as that resume's single-prompt answer. Candidates missing from the answer or
+    failing validation are analyzed on their own instead (`fallback`).
+    """
+    candidates = candidate_ids(len(resume_texts))
+    prompt = build_packed_prompt(jd_text, resume_texts)
+    answer = generate_text(model, prompt, PACK_PROMPT_VERSION, timeout=timeout, use_cache=use_cache,
+                           validate=lambda text: not any(errors for _, errors in split_packed_answer(text, candidates).values()),
+                           generation_config=JSON_CONFIG, priority=priority)
+    with telemetry.span("response_parsing", pack_size=len(resume_texts)):
+        parsed = split_packed_answer(answer, candidates)
+    _observe_answer(estimate_tokens(answer or ""), len(resume_texts))
+
+    saved = tokens_saved(jd_text, resume_texts, prompt)
+    results = []
+    for candidate, resume_text, candidate_saved in zip(candidates, resume_texts, saved):
+        sections, errors = parsed[candidate]
+        if errors:
+            result = analyze_competency(model, jd_text, resume_text, use_cache=use_cache, timeout=timeout,
+                                        priority=priority)
+            # The candidate's own prompt was sent after all, on top of its share of the packed one.
+            candidate_saved -= estimate_tokens(build_prompt(jd_text, resume_text))
+        else:
+            answer_json = json.dumps(sections, ensure_ascii=False)
+            cache_answer(model, build_prompt(jd_text, resume_text), PROMPT_VERSION, answer_json)
+            remember_result(jd_text, resume_text, PROMPT_VERSION, answer_json)
+            result = result_from_sections(sections)
+        results.append(dict(result, packing={"pack_size": len(resume_texts), "tokens_saved": candidate_saved,
+                                             "fallback": bool(errors)}))
+    return results
@@ -0,0 +1,240 @@
+import contextvars
+import hashlib
+import json
+import os
+import re
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from disk_cache import DiskCache, DEFAULT_CACHE_DIR, make_key
+from gemini_client import CACHE_DISABLED, MODEL_NAME, generate_text
+from competency_analysis import (JSON_CONFIG, PROMPT_VERSION, SECTION_SCHEMAS, _as_int, _count, _load_json,
+                                 analyze_competency, result_from_sections, validate_matrix)
+from jd_dedup import find_reusable, normalize_jd, remember_result
+from model_scheduler import INTERACTIVE
+import telemetry
+
+# Bump when the section prompt or the merge rules change so stored section results are not reused.
+SECTION_PROMPT_VERSION = f"{PROMPT_VERSION}:section-v1"
+
+# Headings (compared in lower case, without trailing punctuation) that start each resume section.
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "career summary", "profile", "professional profile", "about me",
+                "about", "objective", "career objective"),
+    "experience": ("experience", "work experience", "professional experience", "relevant experience",
+                   "employment", "employment history", "work history", "internships", "internship"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies", "competencies",
+               "technologies", "tools", "tools & technologies", "tools and technologies", "skills & tools"),
+    "education": ("education", "academic background", "academics", "qualifications", "education & certifications",
+                  "certifications", "certificates", "courses"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects", "selected projects"),
+}
+SECTION_NAMES = tuple(SECTION_HEADINGS)
+_HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+section_cache = DiskCache(
+    os.path.join(DEFAULT_CACHE_DIR, "resume_sections.sqlite3"),
+    max_bytes=int(os.getenv("RESUME_TOOLS_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+    ttl_seconds=float(os.getenv("RESUME_TOOLS_CACHE_TTL", 7 * 24 * 3600)),
+)
+
+section_prompt_template = """
+You are an expert ATS and career strategist. Below is one section ("{section}") of a resume, not the whole resume.
+Map the job description's skills and keywords against this section only.
+Respond with a single JSON object, and nothing else, that follows this schema:
+{{
+  {matrix_schema},
+  "industry_benchmark_score": <integer 0-100>,
+  "section_review": "<one or two sentences on how well this section supports the application>"
+}}
+- "competency_matrix" lists every important skill or keyword from the job description. Mark a skill present only if this section shows it.
+- "industry_benchmark_score" is the typical match for this kind of role (e.g., 75 for a senior role in tech).
+
+**Job Description:**
+{jd_text}
+
+**Resume section ({section}):**
+{section_text}
+
+**Output:**
+"""
+
+section_repair_template = """
+You are an expert ATS and career strategist. An earlier answer mapping the job description against one section ("{section}") of a resume was invalid:
+{errors}
+
+Respond with a single JSON object, and nothing else, that follows this schema:
+{{
+  {matrix_schema},
+  "industry_benchmark_score": <integer 0-100>,
+  "section_review": "<one or two sentences on how well this section supports the application>"
+}}
+
+**Job Description:**
+{jd_text}
+
+**Resume section ({section}):**
+{section_text}
+
+**Output:**
+"""
+
+def _heading(line: str) -> str | None:
+    """The section a line starts, if the line is nothing but a known heading."""
+    candidate = re.sub(r"[\s:\-–—|•*#]+$|^[\s\-–—|•*#]+", "", line).lower()
+    if len(candidate) > 40:
+        return None
+    return _HEADING_LOOKUP.get(re.sub(r"\s+", " ", candidate))
+
+def split_sections(resume_text: str) -> dict[str, str]:
+    """
+    Splits a resume into the sections in SECTION_NAMES, in document order.
+
+    Text before the first recognized heading (name, contact details, an untitled summary)
+    belongs to "summary". Unrecognized headings stay inside the section they appear in, and
+    a section whose heading appears twice collects both parts.
+    """
+    parts = {}
+    current = "summary"
+    for line in resume_text.split("\n"):
+        name = _heading(line)
+        if name:
+            current = name
+            continue
+        parts.setdefault(current, []).append(line)
+    sections = {name: "\n".join(lines).strip() for name, lines in parts.items()}
+    return {name: text for name, text in sections.items() if text}
+
+def section_hash(text: str) -> str:
+    """Identifies a section's content regardless of whitespace and line breaks."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def _section_key(model, jd_text: str, name: str, text: str) -> str:
+    return make_key(getattr(model, "model_name", MODEL_NAME), SECTION_PROMPT_VERSION, normalize_jd(jd_text),
+                    name, section_hash(text))
+
+def parse_section(text: str) -> tuple[dict | None, list[str]]:
+    """Validates one section answer; returns ({"competency_matrix", "industry_benchmark_score", "section_review"}, problems)."""
+    data = _load_json(text)
+    if not isinstance(data, dict):
+        return None, ["the answer is not a JSON object"]
+    rows, problems = validate_matrix(data.get("competency_matrix"))
+    if not rows:
+        return None, problems
+    return {
+        "competency_matrix": rows,
+        "industry_benchmark_score": _as_int(data.get("industry_benchmark_score"), 0, 100),
+        "section_review": str(data.get("section_review") or "").strip(),
+    }, problems
+
+def analyze_section(model, jd_text: str, name: str, text: str, use_cache: bool = True, timeout: int = 180,
+                    priority: int = INTERACTIVE) -> tuple[dict, bool]:
+    """Returns the validated analysis of one resume section and whether it was served from the section cache."""
+    use_cache = use_cache and not CACHE_DISABLED
+    key = _section_key(model, jd_text, name, text)
+    if use_cache:
+        cached = section_cache.get_text(key)
+        if cached is not None:
+            return json.loads(cached), True
+
+    prompt = section_prompt_template.format(section=name, matrix_schema=SECTION_SCHEMAS["competency_matrix"],
+                                            jd_text=jd_text, section_text=text)
+    # The section cache stores the validated result, so the raw answer is not cached as well.
+    answer = generate_text(model, prompt, SECTION_PROMPT_VERSION, timeout=timeout, use_cache=False,
+                           generation_config=JSON_CONFIG, priority=priority)
+    with telemetry.span("response_parsing", section=name):
+        result, problems = parse_section(answer)
+    _count(answers=1, parse_failures=1 if result is None else 0)
+    if result is None:
+        # Like the whole-resume analysis, an invalid answer gets one repair call for just this section.
+        repair_prompt = section_repair_template.format(section=name, errors="\n".join(f"- {p}" for p in problems),
+                                                       matrix_schema=SECTION_SCHEMAS["competency_matrix"],
+                                                       jd_text=jd_text, section_text=text)
+        _count(repair_calls=1)
+        repaired = generate_text(model, repair_prompt, SECTION_PROMPT_VERSION, timeout=timeout, use_cache=False,
+                                 generation_config=JSON_CONFIG, priority=priority)
+        result, problems = parse_section(repaired)
+        if result is None:
+            _count(unrepaired=1)
+            raise ValueError(f"The model returned an invalid analysis of the '{name}' section: {'; '.join(problems)}")
+        _count(repaired=1)
+    section_cache.set_text(key, json.dumps(result, ensure_ascii=False))
+    return result, False
+
+def merge_sections(results: dict[str, dict]) -> dict:
+    """
+    Combines per-section analyses into the sections of a whole-resume analysis.
+
+    A skill is present if any section shows it, rated by its best section. The overall
+    match score weighs each of the job description's skills by the rating the model gave
+    it where present, so a skill that is only touched on counts for less than a strong one.
+    """
+    merged = {}
+    for name in SECTION_NAMES:
+        for row in results.get(name, {}).get("competency_matrix", []):
+            key = row["skill"].lower()
+            best = merged.get(key)
+            if best is None or (row["present"], row["rating"]) > (best["present"], best["rating"]):
+                merged[key] = dict(row, suggestion=row["suggestion"] or (best or {}).get("suggestion", ""))
+    rows = list(merged.values())
+    matched = sorted((row for row in rows if row["present"]), key=lambda row: -row["rating"])
+    missing = [row for row in rows if not row["present"]]
+    benchmarks = [result["industry_benchmark_score"] for result in results.values()
+                  if result.get("industry_benchmark_score") is not None]
+    reviews = [f"**{name.title()}:** {results[name]['section_review']}" for name in SECTION_NAMES
+               if name in results and results[name].get("section_review")]
+    tip_row = missing[0] if missing else (matched[-1] if matched else None)
+    report = {
+        "overall_match_score": round(10 * sum(row["rating"] for row in matched) / len(rows)) if rows else 0,
+        "top_matched_skills": [row["skill"] for row in matched[:5]],
+        "top_missing_skills": [row["skill"] for row in missing[:5]],
+        "industry_benchmark_score": round(statistics.median(benchmarks)) if benchmarks else 75,
+        "ai_tip": (tip_row["suggestion"] if tip_row and tip_row["suggestion"]
+                   else "Quantify the impact of your most relevant experience."),
+        "final_review": " ".join(reviews) or (f"The resume shows {len(matched)} of the {len(rows)} skills "
+                                              f"the job description asks for."),
+    }
+    return {"competency_matrix": rows, "report": report}
+
+def analyze_by_section(model, jd_text: str, resume_text: str, use_cache: bool = True, timeout: int = 180,
+                       priority: int = INTERACTIVE, reuse_similar_jd: bool = False) -> dict:
+    """
+    Runs the competency mapping one resume section at a time and merges the results.
+
+    Each section's result is cached by its content hash and the job description, so after
+    an edit only the changed sections reach the model. Returns the same dict as
+    `analyze_competency`, plus `resume_sections` with the section count and how many were
+    reused. A resume without at least two recognizable sections is analyzed as a whole.
+
+    With `reuse_similar_jd`, an earlier section-mode result for the same resume against a
+    near-identical job description is returned first, as `analyze_competency` does for whole
+    resumes. The two modes file their results under different prompt versions, so neither
+    serves the other's answers.
+    """
+    if reuse_similar_jd:
+        reuse = find_reusable(jd_text, resume_text, SECTION_PROMPT_VERSION)
+        if reuse:
+            return dict(result_from_sections(json.loads(reuse.pop("result")), reused=reuse), resume_sections=None)
+
+    sections = split_sections(resume_text)
+    if len(sections) < 2:
+        return dict(analyze_competency(model, jd_text, resume_text, use_cache=use_cache, timeout=timeout,
+                                       priority=priority, reuse_similar_jd=reuse_similar_jd), resume_sections=None)
+
+    with ThreadPoolExecutor(max_workers=len(sections)) as pool:
+        # Each task runs in a copy of this context so its spans keep the request's trace labels.
+        futures = {name: pool.submit(contextvars.copy_context().run, analyze_section, model, jd_text, name, text,
+                                     use_cache, timeout, priority)
+                   for name, text in sections.items()}
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {name: result for name, (result, _) in outcomes.items()}
+    reused = [name for name, (_, from_cache) in outcomes.items() if from_cache]
+    merged = merge_sections(results)
+    remember_result(jd_text, resume_text, SECTION_PROMPT_VERSION, json.dumps(merged, ensure_ascii=False))
+    return dict(result_from_sections(merged),
+                resume_sections={"total": len(sections), "reused": len(reused), "reused_names": reused,
+                                 "names": list(sections)})
+
+def format_section_stats(stats: dict) -> str:
+    return (f"♻️ {stats['reused']} of {stats['total']} resume sections unchanged and reused; "
+            f"{stats['total'] - stats['reused']} re-analyzed.")
@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import socket
+import statistics
+import threading
+import time
+
+# The load test measures the service, not the model quota, so lift the scheduler's limits
+# (the project modules read these on import) unless they are set explicitly.
+os.environ.setdefault("RESUME_TOOLS_MODEL_RPM", "1000000")
+os.environ.setdefault("RESUME_TOOLS_MODEL_TPM", "1000000000")
+
+import requests
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_local_service(workers: int, max_pending: int, latency: float):
+    """Starts the service with a fake model in a background thread and returns (base URL, server)."""
+    import uvicorn
+    from analysis_service import JobManager, create_app
+    from fake_model import FakeModel
+    port = _free_port()
+    app = create_app(JobManager(workers, max_pending, model=FakeModel(latency=latency, jitter=latency / 2)))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+def _client(base_url: str, analyses: list[str], deadline: float, poll_interval: float, results: dict, lock):
+    from benchmark import make_job_description
+    session = requests.Session()
+    rng = random.Random()
+    while time.monotonic() < deadline:
+        seed = rng.randrange(10 ** 9)
+        # Unique inputs with caching off, so every job reaches the (fake) model.
+        spec = {"analysis": rng.choice(analyses), "jd_text": make_job_description(150, seed=seed % 100),
+                "resume_text": f"Candidate {seed}. Python developer with Docker, SQL and AWS experience.",
+                "use_cache": False}
+        started = time.monotonic()
+        response = session.post(f"{base_url}/jobs", json=spec)
+        http_requests = 1
+        if response.status_code == 429:
+            with lock:
+                results["rejected"] += 1
+                results["http_requests"] += 1
+            time.sleep(min(float(response.headers.get("Retry-After", 1)), 1.0) * rng.random())
+            continue
+        response.raise_for_status()
+        job_id = response.json()["id"]
+        while True:
+            time.sleep(poll_interval)
+            status = session.get(f"{base_url}/jobs/{job_id}").json()["status"]
+            http_requests += 1
+            if status in ("done", "error"):
+                break
+        if status == "done":
+            session.get(f"{base_url}/jobs/{job_id}/result").raise_for_status()
+            http_requests += 1
+        with lock:
+            results["http_requests"] += http_requests
+            results[status] += 1
+            results["latencies"].append(time.monotonic() - started)
+
+def run_load_test(base_url: str, clients: int, duration: float, analyses: list[str], poll_interval: float = 0.05) -> dict:
+    """Keeps `clients` concurrent submit-poll-fetch loops running for `duration` seconds and reports throughput."""
+    results = {"done": 0, "error": 0, "rejected": 0, "http_requests": 0, "latencies": []}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    threads = [threading.Thread(target=_client, args=(base_url, analyses, deadline, poll_interval, results, lock))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies = sorted(results.pop("latencies"))
+    return {
+        **results,
+        "seconds": round(elapsed, 2),
+        "jobs_per_second": round(results["done"] / elapsed, 2),
+        "http_requests_per_second": round(results["http_requests"] / elapsed, 2),
+        "job_p50_seconds": round(statistics.median(latencies), 3) if latencies else None,
+        "job_p95_seconds": round(latencies[int(0.95 * (len(latencies) - 1))], 3) if latencies else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the analysis service with a stubbed model.")
+    parser.add_argument("--url", help="Test a running service instead of starting a local one with the fake model.")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent clients (default: 32).")
+    parser.add_argument("--duration", type=float, default=20, help="Test length in seconds (default: 20).")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake model seconds per call (default: 0.5).")
+    parser.add_argument("--workers", type=int, default=8, help="Worker pool size of the local service (default: 8).")
+    parser.add_argument("--max-pending", type=int, default=64, help="Queue bound of the local service (default: 64).")
+    parser.add_argument("--analysis", action="append", help="Analysis types to submit (default: all of them).")
+    args = parser.parse_args(argv)
+
+    base_url = args.url
+    server = None
+    if not base_url:
+        base_url, server = start_local_service(args.workers, args.max_pending, args.latency)
+    analyses = args.analysis or requests.get(f"{base_url}/analyses").json()["analyses"]
+    print(f"Load testing {base_url} with {args.clients} clients for {args.duration:.0f}s...")
+    report = run_load_test(base_url, args.clients, args.duration, analyses)
+    for key, value in report.items():
+        print(f"{key:<26}{value}")
+    print(f"{'service':<26}{requests.get(f'{base_url}/healthz').json()}")
+    if server:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
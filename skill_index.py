@@ -0,0 +1,189 @@
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from disk_cache import DEFAULT_CACHE_DIR
+from gemini_client import get_model
+from batch_ranker import analyze_resume, candidate_id, load_job_description, read_resume, write_outputs
+from local_scorer import tokenize, BM25_K1, BM25_B
+
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "skill_index.sqlite3")
+
+class SkillIndex:
+    """
+    An incremental, on-disk inverted index over resume text.
+
+    Each term maps to a posting list of (resume ID, term frequency). Resumes can be added,
+    replaced or removed one at a time, and a job description is answered with BM25 over
+    only the posting lists of its own terms, so queries do not scan the whole corpus.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " doc_id TEXT PRIMARY KEY, name TEXT NOT NULL, length INTEGER NOT NULL, text TEXT NOT NULL, added REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL, PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);"
+        )
+        self._conn.commit()
+
+    def add(self, doc_id: str, name: str, text: str) -> int:
+        """
+        Indexes a resume, replacing any earlier version stored under the same ID or file name
+        (an edited resume gets a new ID). Returns the number of earlier versions dropped.
+        """
+        tokens = tokenize(text)
+        with self._lock, self._conn:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT doc_id FROM docs WHERE name = ? AND doc_id != ?", (name, doc_id)).fetchall()]
+            for old_id in stale + [doc_id]:
+                self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (old_id,))
+            self._conn.executemany("DELETE FROM docs WHERE doc_id = ?", ((old_id,) for old_id in stale))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO docs (doc_id, name, length, text, added) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, name, len(tokens), text, time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                ((term, doc_id, tf) for term, tf in Counter(tokens).items()),
+            )
+        return len(stale)
+
+    def remove(self, doc_id: str) -> bool:
+        """Drops a resume and its postings. Returns False if it was not indexed."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            return self._conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,)).rowcount > 0
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM docs WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def get(self, doc_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id, name, text FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return {"doc_id": row[0], "name": row[1], "text": row[2]} if row else None
+
+    def search(self, jd_text: str, top_n: int = 20) -> list[dict]:
+        """Returns the `top_n` resumes that best match the job description, best first."""
+        terms = list(dict.fromkeys(tokenize(jd_text)))
+        if not terms:
+            return []
+        placeholders = ",".join("?" * len(terms))
+        with self._lock:
+            n_docs, avg_len = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not n_docs:
+                return []
+            rows = self._conn.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id"
+                f" WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+        avg_len = avg_len or 1.0
+        doc_freq = Counter(term for term, _, _, _ in rows)
+        scores, matched = {}, {}
+        for term, doc_id, tf, length in rows:
+            idf = math.log(1.0 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+            matched.setdefault(doc_id, []).append(term)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_n]
+        with self._lock:
+            names = dict(self._conn.execute(
+                f"SELECT doc_id, name FROM docs WHERE doc_id IN ({','.join('?' * len(best))})", best
+            ).fetchall()) if best else {}
+        return [
+            {"doc_id": doc_id, "name": names.get(doc_id, doc_id), "score": round(scores[doc_id], 4),
+             "matched_terms": matched[doc_id]}
+            for doc_id in best
+        ]
+
+def index_directory(index: SkillIndex, resume_dir: str, workers: int = 4) -> tuple[int, int]:
+    """
+    Adds every resume PDF in a directory that is not indexed yet, replacing the earlier
+    version of a file whose content changed. Returns the number added and how many of
+    those replaced an earlier version.
+    """
+    paths = sorted(os.path.join(resume_dir, n) for n in os.listdir(resume_dir) if n.lower().endswith(".pdf"))
+    added = replaced = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, (data, text) in zip(paths, pool.map(read_resume, paths)):
+            doc_id = candidate_id(path, data)
+            if text.strip() and doc_id not in index:
+                replaced += 1 if index.add(doc_id, os.path.basename(path), text) else 0
+                added += 1
+    return added, replaced
+
+def analyze_matches(index: SkillIndex, jd_text: str, top_n: int, out_dir: str, workers: int = 4,
+                    use_cache: bool = True, model=None) -> list[dict]:
+    """Retrieves the best `top_n` indexed resumes and runs the competency-mapping flow on them."""
+    model = model or get_model()
+    hits = index.search(jd_text, top_n)
+
+    def run(hit):
+        record = {"candidate_id": hit["doc_id"], "file": hit["name"], "index_score": hit["score"]}
+        try:
+            record.update(analyze_resume(model, jd_text, index.get(hit["doc_id"])["text"], use_cache=use_cache), status="ok")
+        except Exception as e:
+            record.update(status="error", error=str(e))
+        return record
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        records = list(pool.map(run, hits))
+    return write_outputs(out_dir, records)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain and query the inverted skill index of past resumes.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index file (default: {DEFAULT_INDEX_PATH}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_cmd = commands.add_parser("add", help="Index every resume PDF in a directory.")
+    add_cmd.add_argument("resume_dir")
+    remove_cmd = commands.add_parser("remove", help="Remove resumes by ID.")
+    remove_cmd.add_argument("doc_ids", nargs="+")
+    query_cmd = commands.add_parser("query", help="Find the best candidates for a job description.")
+    jd_group = query_cmd.add_mutually_exclusive_group(required=True)
+    jd_group.add_argument("--jd-text", help="Job description text.")
+    jd_group.add_argument("--jd-pdf", help="Path to a job description PDF.")
+    jd_group.add_argument("--jd-url", help="LinkedIn job posting URL.")
+    query_cmd.add_argument("--top", type=int, default=20, help="Number of candidates to return (default: 20).")
+    query_cmd.add_argument("--analyze", metavar="OUT_DIR", help="Run competency mapping on the results into OUT_DIR.")
+    args = parser.parse_args(argv)
+
+    index = SkillIndex(args.index)
+    if args.command == "add":
+        added, replaced = index_directory(index, args.resume_dir)
+        print(f"Indexed {added} new resumes, {replaced} of them replacing an edited file ({len(index)} total).")
+    elif args.command == "remove":
+        for doc_id in args.doc_ids:
+            print(f"{doc_id}: {'removed' if index.remove(doc_id) else 'not found'}")
+    else:
+        jd_text = load_job_description(args.jd_text, args.jd_pdf, args.jd_url)
+        started = time.perf_counter()
+        hits = index.search(jd_text, args.top)
+        print(f"{len(hits)} candidates in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for rank, hit in enumerate(hits, 1):
+            print(f"{rank:>3}. {hit['score']:>8.3f}  {hit['doc_id']}  {hit['name']}")
+        if args.analyze:
+            ranked = analyze_matches(index, jd_text, args.top, args.analyze)
+            print(f"Competency mapping for {len(ranked)} candidates written to {args.analyze}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from disk_cache import DEFAULT_CACHE_DIR
+
+# Every finished span is appended here as one JSON line; set RESUME_TOOLS_TELEMETRY_LOG="" to disable.
+LOG_FILE = os.getenv("RESUME_TOOLS_TELEMETRY_LOG", os.path.join(DEFAULT_CACHE_DIR, "telemetry.jsonl"))
+LOG_MAX_BYTES = 10 * 1024 * 1024
+# Set RESUME_TOOLS_ADMIN=1 to show the metrics panel in the apps.
+ADMIN_ENABLED = os.getenv("RESUME_TOOLS_ADMIN", "").lower() in ("1", "true", "yes")
+
+# Upper bounds (seconds) of the latency histogram buckets, as in a Prometheus histogram.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, math.inf)
+# Recent durations kept per series for percentiles.
+SAMPLES_PER_SERIES = 2000
+
+_trace = contextvars.ContextVar("resume_tools_trace", default=None)
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_histograms = {}
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SERIES))
+_tokens = defaultdict(int)
+# Metric name -> (type, help text, callable returning [(labels dict, value), ...]) read at export time.
+_collectors = {}
+
+def _current() -> dict:
+    return _trace.get() or {"trace_id": None, "analysis": "-"}
+
+@contextmanager
+def trace(analysis: str):
+    """
+    Groups the spans of one request under a trace id and labels them with the analysis type.
+
+    Context variables do not follow work into thread pools on their own; submit with
+    `contextvars.copy_context().run` so worker spans keep the request's labels.
+    """
+    token = _trace.set({"trace_id": uuid.uuid4().hex[:16], "analysis": analysis})
+    try:
+        yield
+    finally:
+        _trace.reset(token)
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Times the enclosed block as `stage` of the current trace, also when it raises.
+
+    Yields the span's attributes so the block can add to them. Exceptions are recorded as
+    errors, but BaseExceptions such as Streamlit's st.stop()/st.rerun() signals are not.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attributes
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        record(stage, time.perf_counter() - started, error=error, **attributes)
+
+def record(stage: str, seconds: float, error: str | None = None, **attributes) -> None:
+    """Adds one duration to the stage's histogram and appends it to the JSON lines log."""
+    context = _current()
+    series = (stage, context["analysis"])
+    with _lock:
+        histogram = _histograms.setdefault(series, {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0, "errors": 0})
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+                break
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+        histogram["errors"] += 1 if error else 0
+        _samples[series].append(seconds)
+    _write_log({"ts": round(time.time(), 3), "trace_id": context["trace_id"], "analysis": context["analysis"],
+                "stage": stage, "seconds": round(seconds, 6), "error": error, **attributes})
+
+def record_usage(response, model_name: str = "") -> dict | None:
+    """Counts the prompt and response tokens reported in a Gemini response's usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    counts = {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "response_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+    }
+    if not any(counts.values()):
+        return None
+    analysis = _current()["analysis"]
+    with _lock:
+        for kind, value in counts.items():
+            _tokens[(kind, analysis, model_name)] += value
+    return counts
+
+def _write_log(entry: dict) -> None:
+    if not LOG_FILE:
+        return
+    line = json.dumps(entry, default=str) + "\n"
+    with _log_lock:
+        try:
+            os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+            if os.path.exists(LOG_FILE) and os.path.getsize(LOG_FILE) > LOG_MAX_BYTES:
+                os.replace(LOG_FILE, LOG_FILE + ".1")
+            with open(LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            # Telemetry must never break an analysis.
+            pass
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+def summarize(samples: dict | None = None) -> list[dict]:
+    """Returns count, mean and p50/p95/p99 (seconds) per (stage, analysis) series, slowest p95 first."""
+    if samples is None:
+        with _lock:
+            samples = {series: list(values) for series, values in _samples.items()}
+    rows = []
+    for (stage, analysis), values in samples.items():
+        if not values:
+            continue
+        ordered = sorted(values)
+        rows.append({
+            "stage": stage, "analysis": analysis, "count": len(ordered), "mean": sum(ordered) / len(ordered),
+            "p50": _percentile(ordered, 0.50), "p95": _percentile(ordered, 0.95), "p99": _percentile(ordered, 0.99),
+        })
+    return sorted(rows, key=lambda row: -row["p95"])
+
+def token_totals() -> list[dict]:
+    with _lock:
+        return [{"kind": kind, "analysis": analysis, "model": model, "tokens": value}
+                for (kind, analysis, model), value in sorted(_tokens.items())]
+
+def _labels(**labels) -> str:
+    escaped = {k: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for k, v in labels.items()}
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+def register_collector(name: str, metric_type: str, help_text: str, collect) -> None:
+    """Adds a gauge or counter, e.g. a cache size, whose current values `collect()` returns on every export."""
+    _collectors[name] = (metric_type, help_text, collect)
+
+def prometheus_text() -> str:
+    """Renders the histograms and token counters in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {series: {**h, "buckets": list(h["buckets"])} for series, h in _histograms.items()}
+        tokens = dict(_tokens)
+    lines = [
+        "# HELP resume_tools_stage_seconds Time spent in each pipeline stage.",
+        "# TYPE resume_tools_stage_seconds histogram",
+    ]
+    for (stage, analysis), h in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, h["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else repr(bound)
+            lines.append(f"resume_tools_stage_seconds_bucket{_labels(stage=stage, analysis=analysis, le=le)} {cumulative}")
+        lines.append(f"resume_tools_stage_seconds_sum{_labels(stage=stage, analysis=analysis)} {h['sum']:.6f}")
+        lines.append(f"resume_tools_stage_seconds_count{_labels(stage=stage, analysis=analysis)} {h['count']}")
+    lines += [
+        "# HELP resume_tools_stage_errors_total Stage executions that raised an exception.",
+        "# TYPE resume_tools_stage_errors_total counter",
+    ]
+    for (stage, analysis), h in sorted(histograms.items()):
+        lines.append(f"resume_tools_stage_errors_total{_labels(stage=stage, analysis=analysis)} {h['errors']}")
+    lines += [
+        "# HELP resume_tools_model_tokens_total Tokens reported by the model, by prompt or response.",
+        "# TYPE resume_tools_model_tokens_total counter",
+    ]
+    for (kind, analysis, model), value in sorted(tokens.items()):
+        lines.append(f"resume_tools_model_tokens_total{_labels(kind=kind, analysis=analysis, model=model)} {value}")
+    for name, (metric_type, help_text, collect) in sorted(_collectors.items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        lines += [f"{name}{_labels(**labels)} {value}" for labels, value in collect()]
+    return "\n".join(lines) + "\n"
+
+def load_log(path: str = LOG_FILE) -> dict:
+    """Reads a JSON lines log back into {(stage, analysis): [seconds, ...]} for `summarize`."""
+    samples = defaultdict(list)
+    if not path or not os.path.exists(path):
+        return samples
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            samples[(entry["stage"], entry.get("analysis", "-"))].append(entry["seconds"])
+    return samples
+
+def format_summary(rows: list[dict]) -> str:
+    lines = [f"{'stage':<22}{'analysis':<30}{'count':>7}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}"]
+    for row in rows:
+        lines.append(f"{row['stage']:<22}{row['analysis'][:29]:<30}{row['count']:>7}"
+                     f"{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the stage timings recorded in the telemetry log.")
+    parser.add_argument("log", nargs="?", default=LOG_FILE, help=f"JSON lines log to read (default: {LOG_FILE}).")
+    args = parser.parse_args(argv)
+    print(format_summary(summarize(load_log(args.log))))
+
+if __name__ == "__main__":
+    main()
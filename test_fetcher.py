@@ -0,0 +1,118 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import linkedin_scraper
+from disk_cache import DiskCache
+
+PAGE = "<html><body><div class='description__text'>Python developer with Docker and AWS.</div></body></html>"
+ETAG = '"stub-v1"'
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves one fixed job page with an ETag and answers a matching If-None-Match with 304."""
+
+    requests_seen = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests_seen.append({"path": self.path, "at": time.monotonic(),
+                                       "if_none_match": self.headers.get("If-None-Match")})
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = PAGE.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_fetcher():
+    """
+    A diagnostic script for the cached LinkedIn fetcher, run against a local stub server
+    instead of LinkedIn. It checks that a fresh page is served from the cache, that a stale
+    one is revalidated with a conditional GET (and reused on 304), and that bulk fetches are
+    spaced out per host.
+    """
+    print("--- Starting Fetcher Test ---")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    saved_cache, saved_fresh = linkedin_scraper.http_cache, linkedin_scraper.FRESH_SECONDS
+    with tempfile.TemporaryDirectory() as directory:
+        # A throwaway cache, so the test neither reads nor pollutes the real one.
+        linkedin_scraper.http_cache = DiskCache(os.path.join(directory, "http_pages.sqlite3"))
+        try:
+            url = f"{base_url}/jobs/view/1"
+            linkedin_scraper.FRESH_SECONDS = 3600
+            body, source = linkedin_scraper._fetch_page(url, None)
+            check("first fetch goes to the server", source == "network" and body == PAGE, source)
+            before = len(StubHandler.requests_seen)
+            body, source = linkedin_scraper._fetch_page(url, None)
+            check("fresh page is served from the cache (TTL hit)",
+                  source == "cache" and body == PAGE and len(StubHandler.requests_seen) == before, source)
+
+            linkedin_scraper.FRESH_SECONDS = 0
+            body, source = linkedin_scraper._fetch_page(url, None)
+            last = StubHandler.requests_seen[-1]
+            check("stale page is revalidated with If-None-Match and reused on 304",
+                  source == "revalidated" and body == PAGE and last["if_none_match"] == ETAG,
+                  f"{source}, If-None-Match={last['if_none_match']}")
+
+            rate = 5.0
+            urls = [f"{base_url}/jobs/view/{n}" for n in range(10, 16)]
+            released = []
+
+            class RecordingRateLimiter(linkedin_scraper.HostRateLimiter):
+                # Timestamps the moment each request is let through, on the client side, so
+                # server-side arrival jitter does not count against the limiter.
+                def wait(self, url):
+                    super().wait(url)
+                    with StubHandler.lock:
+                        released.append(time.monotonic())
+
+            saved_limiter = linkedin_scraper.HostRateLimiter
+            linkedin_scraper.HostRateLimiter = RecordingRateLimiter
+            try:
+                started = time.monotonic()
+                pages = linkedin_scraper.fetch_many(urls, max_workers=6, per_host_rate=rate)
+                elapsed = time.monotonic() - started
+            finally:
+                linkedin_scraper.HostRateLimiter = saved_limiter
+            times = sorted(released)
+            gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+            # Sleeps never end early, so the last release is at least (n - 1)/rate after the start;
+            # single gaps get a looser bound because one late wake-up shortens the next gap.
+            check("bulk fetches respect the per-host rate limit",
+                  all(isinstance(pages[u], str) for u in urls) and len(times) == len(urls)
+                  and min(gaps) >= 0.75 / rate and times[-1] - started >= (len(urls) - 1) * 0.95 / rate,
+                  f"{len(urls)} pages in {elapsed:.2f}s, smallest gap {min(gaps) * 1000:.0f} ms")
+        finally:
+            linkedin_scraper.http_cache, linkedin_scraper.FRESH_SECONDS = saved_cache, saved_fresh
+            server.shutdown()
+
+    print(f"\n--- Fetcher Test Finished: {'all checks passed' if not failures else f'{len(failures)} failed'} ---")
+    assert not failures, failures
+
+if __name__ == "__main__":
+    try:
+        test_fetcher()
+    except AssertionError:
+        sys.exit(1)
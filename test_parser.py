@@ -1,5 +1,5 @@
 import os
-from PyPDF2 import PdfReader
+from pdf_extract import extract_pages
 import tkinter as tk
 from tkinter import filedialog
 
@@ -28,13 +28,15 @@ def test_pdf_parser():
     print(f"▶️ Testing with file: {file_path}")
 
     try:
-        with open(file_path, "rb") as f:
-            pdf_reader = PdfReader(f)
-            text = "".join(page.extract_text() or "" for page in pdf_reader.pages)
+        pages = extract_pages(file_path)
+        text = "".join(page["text"] for page in pages)
 
         if text:
             print("\\n--- ✅ PDF Parsed Successfully ---")
             print(f"Total characters extracted: {len(text)}")
+            print(f"Pages: {len(pages)}, extraction time: {sum(page['seconds'] for page in pages):.3f}s")
+            slowest = max(pages, key=lambda page: page["seconds"])
+            print(f"Slowest page: {slowest['page']} ({slowest['seconds']:.3f}s)")
             print("\\n--- First 500 Characters ---")
             print(text[:500] + "...")
             print("------------------------------")
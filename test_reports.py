@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import zipfile
+import pandas as pd
+import report_generator
+
+MATRIX = [
+    {"Skill/Keyword": "Python", "Present in Resume": "✅", "Competency Rating (1-10)": "9", "Suggestion": "-"},
+    {"Skill/Keyword": "Docker", "Present in Resume": "✅", "Competency Rating (1-10)": "10", "Suggestion": "-"},
+    {"Skill/Keyword": "AWS", "Present in Resume": "❌", "Competency Rating (1-10)": "7", "Suggestion": "Add a cloud project."},
+]
+
+def test_reports():
+    """
+    A diagnostic script for the batch report path. Batch records store the competency matrix
+    as strings, so it writes a reports zip from such records and checks that the bar chart
+    orders the ratings numerically rather than alphabetically.
+    """
+    print("--- Starting Report Test ---")
+    failures = []
+
+    def check(name, ok, detail=""):
+        print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+        if not ok:
+            failures.append(name)
+
+    records = [{"candidate_id": "cand-1", "file": "cand-1.pdf", "status": "ok", "match_score": 80,
+                "report": "Strong backend profile.", "competency_matrix": MATRIX}]
+    order = report_generator._bar_chart_rows(pd.DataFrame(MATRIX))["Skill/Keyword"].tolist()
+    check("string ratings are sorted numerically in the bar chart", order == ["AWS", "Python", "Docker"], order)
+
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path = os.path.join(directory, "reports.zip")
+        written = report_generator.write_candidate_reports(records, zip_path, max_workers=1)
+        with zipfile.ZipFile(zip_path) as archive:
+            names = archive.namelist()
+            index = json.loads(archive.read("index.json"))
+            pdf = archive.read("cand-1.pdf") if "cand-1.pdf" in names else b""
+        check("reports zip is written from string-typed records",
+              written == 1 and pdf.startswith(b"%PDF") and index[0]["report"] == "cand-1.pdf",
+              f"{written} report(s), files {names}")
+
+    print(f"\n--- Report Test Finished: {'all checks passed' if not failures else f'{len(failures)} failed'} ---")
+    assert not failures, failures
+
+if __name__ == "__main__":
+    try:
+        test_reports()
+    except AssertionError:
+        sys.exit(1)
@@ -0,0 +1,126 @@
+import os
+import re
+import telemetry
+
+# Default per-document budgets, in estimated tokens.
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOOLS_RESUME_TOKENS", 3000))
+JD_TOKEN_BUDGET = int(os.getenv("RESUME_TOOLS_JD_TOKENS", 1500))
+
+# Paragraphs that appear in many job postings but say nothing about the role.
+BOILERPLATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"\bequal (employment )?opportunity\b",
+    r"\bwithout regard to (race|color|religion|sex|gender)",
+    r"\b(race|color|religion|sex|national origin|age|disability|veteran status|sexual orientation|gender identity)"
+    r"(,| or| and)[^.]*(protected|characteristic)",
+    r"\breasonable accommodations?\b",
+    r"\be-?verify\b",
+    r"\bshow more\b|\bshow less\b",
+    r"\bapply now\b|\bsave job\b|\breport this job\b",
+    r"\bseniority level\b|\bemployment type\b|\bjob function\b|\bindustries\b",
+    r"\breferrals increase your chances\b",
+    r"\bby clicking apply\b|\bprivacy (policy|notice)\b",
+)]
+
+_WORD_OR_SYMBOL = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the model token count without a network round trip.
+
+    Words longer than four characters usually split into several sub-word tokens, so each
+    word counts as roughly one token per four characters and every symbol counts as one.
+    """
+    return sum(max(1, (len(piece) + 1) // 4) for piece in _WORD_OR_SYMBOL.findall(text or ""))
+
+def normalize_text(text: str, strip_boilerplate: bool = False, drop_repeated_lines: bool = False) -> str:
+    """
+    Collapses whitespace and drops a line that repeats the one right before it. Optionally
+    removes known job-posting boilerplate and every later copy of a line seen before.
+
+    Repeats further apart are only dropped on request: in a job posting they are page chrome,
+    but in a resume the same line can be real content, e.g. one job title held at two employers.
+    """
+    # The LinkedIn scraper historically joined sections with a literal backslash-n.
+    text = (text or "").replace("\\n", "\n").replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\u00a0", " ").replace("\u200b", "")
+    seen = set()
+    previous = None
+    lines = []
+    for line in text.split("\n"):
+        line = re.sub(r"[ \t\f\v]+", " ", line).strip()
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            previous = None
+            continue
+        if strip_boilerplate and any(p.search(line) for p in BOILERPLATE_PATTERNS):
+            # Drop only the offending sentences, so a posting pasted as one long line survives.
+            line = " ".join(sentence for sentence in re.split(r"(?<=[.!?])\s+", line)
+                            if not any(p.search(sentence) for p in BOILERPLATE_PATTERNS))
+            if not line:
+                continue
+        # Bullets pasted twice (and, on request, repeated page headers/footers) only cost tokens.
+        fingerprint = line.lower()
+        if previous == fingerprint or (drop_repeated_lines and fingerprint in seen and len(fingerprint) > 3):
+            continue
+        seen.add(fingerprint)
+        previous = fingerprint
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Keeps lines from the start of the text until the token budget is used up, cutting the last one at a word."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            words = []
+            for word in line.split(" "):
+                used += estimate_tokens(word)
+                if used > max_tokens:
+                    break
+                words.append(word)
+            if words:
+                kept.append(" ".join(words))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept).rstrip()
+
+def prepare_text(text: str, max_tokens: int, is_job_description: bool = False) -> tuple[str, dict]:
+    """
+    Normalizes a resume or job description and trims it to `max_tokens`.
+
+    Returns the prepared text and a stats dict with the estimated tokens before and after.
+    """
+    tokens_before = estimate_tokens(text)
+    normalized = normalize_text(text, strip_boilerplate=is_job_description, drop_repeated_lines=is_job_description)
+    prepared = trim_to_budget(normalized, max_tokens)
+    tokens_after = estimate_tokens(prepared)
+    return prepared, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "truncated": len(prepared) < len(normalized),
+    }
+
+def prepare_inputs(jd_text: str, resume_text: str, jd_budget: int = JD_TOKEN_BUDGET,
+                   resume_budget: int = RESUME_TOKEN_BUDGET) -> tuple[str, str, dict]:
+    """Prepares both prompt inputs and returns them with combined token statistics."""
+    with telemetry.span("preprocess"):
+        jd, jd_stats = prepare_text(jd_text, jd_budget, is_job_description=True)
+        resume, resume_stats = prepare_text(resume_text, resume_budget)
+    stats = {
+        "tokens_before": jd_stats["tokens_before"] + resume_stats["tokens_before"],
+        "tokens_after": jd_stats["tokens_after"] + resume_stats["tokens_after"],
+        "jd": jd_stats,
+        "resume": resume_stats,
+    }
+    stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+    return jd, resume, stats
+
+def format_token_stats(stats: dict) -> str:
+    return (f"🔢 Prompt input: {stats['tokens_before']:,} → {stats['tokens_after']:,} estimated tokens "
+            f"({stats['tokens_saved']:,} saved)")